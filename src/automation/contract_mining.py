@@ -3,8 +3,8 @@ from typing import Any, Dict, List, Optional, Tuple
 
 from client import ApiError, SpaceTradersClient
 
-from .mining import (MiningError, mine_for_contract, mine_resources,
-                     prepare_for_mining, wait_for_cooldown)
+from .mining import (MiningError, has_mining_laser, mine_for_contract,
+                     mine_resources, prepare_for_mining, wait_for_cooldown)
 
 
 class ContractMiningError(Exception):
@@ -119,10 +119,7 @@ def find_mining_ship(client: SpaceTradersClient) -> Optional[str]:
                 ship
                 for ship in ships["data"]
                 if ship["registration"]["role"] == "COMMAND"
-                and not any(
-                    mount["symbol"].startswith("MOUNT_MINING_LASER")
-                    for mount in ship["mounts"]
-                )
+                and not has_mining_laser(ship)
             ),
             None,
         )
@@ -139,10 +136,7 @@ def find_mining_ship(client: SpaceTradersClient) -> Optional[str]:
                 ship
                 for ship in ships["data"]
                 if ship["registration"]["role"] == "EXCAVATOR"
-                and any(
-                    mount["symbol"].startswith("MOUNT_MINING_LASER")
-                    for mount in ship["mounts"]
-                )
+                and has_mining_laser(ship)
             ),
             None,
         )
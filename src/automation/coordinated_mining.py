@@ -1,11 +1,16 @@
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Tuple
 
-from client import ApiError, SpaceTradersClient
+from client import (ApiError, SpaceTradersClient, backoff_delay,
+                    distance_between)
 
-from .mining import (MiningError, calculate_transit_time, find_command_ship,
-                     find_mining_drone, mine_resources, prepare_for_mining,
-                     wait_for_arrival, wait_for_cooldown)
+from .mining import (SHIP_STATE_ERRORS, MiningError, calculate_transit_time,
+                     find_command_ship, find_mining_drone,
+                     is_cooldown_conflict, is_not_docked, is_not_in_orbit,
+                     mine_resources, prepare_for_mining,
+                     sleep_until_cooldown_expires, wait_for_arrival,
+                     wait_for_cooldown)
 
 
 class CoordinatedMiningError(Exception):
@@ -14,90 +19,40 @@ class CoordinatedMiningError(Exception):
     pass
 
 
-class RateLimiter:
-    """Rate limiter that respects SpaceTraders API limits"""
-
-    def __init__(self):
-        self.requests = []  # List of timestamps of recent requests
-        self.burst_window = 60  # 60 seconds for burst window
-        self.burst_limit = 30  # 30 requests per burst window
-        self.rate_limit = 2  # 2 requests per second
-        self.last_request_time = 0
-
-    def wait_if_needed(self):
-        """Wait if necessary to respect rate limits"""
-        current_time = time.time()
-
-        # Clean up old requests outside burst window
-        self.requests = [
-            t for t in self.requests if current_time - t < self.burst_window
-        ]
-
-        # Check burst limit
-        if len(self.requests) >= self.burst_limit:
-            oldest_request = self.requests[0]
-            wait_time = oldest_request + self.burst_window - current_time
-            if wait_time > 0:
-                print(f"Burst limit reached. Waiting {wait_time:.1f} seconds...")
-                time.sleep(wait_time)
-                # After waiting, clean up old requests again
-                current_time = time.time()
-                self.requests = [
-                    t for t in self.requests if current_time - t < self.burst_window
-                ]
-
-        # Check rate limit (2 requests per second)
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < (1 / self.rate_limit):
-            wait_time = (1 / self.rate_limit) - time_since_last
-            time.sleep(wait_time)
-
-        # Record this request
-        self.requests.append(current_time)
-        self.last_request_time = current_time
-
-
-# Global rate limiter instance
-GLOBAL_RATE_LIMITER = RateLimiter()
-
-
 def ensure_ships_docked(
-    client: SpaceTradersClient, ship1_symbol: str, ship2_symbol: str
+    client: SpaceTradersClient,
+    ship1_symbol: str,
+    ship2_symbol: str,
+    ships: Optional[List[Dict[str, Any]]] = None,
 ) -> bool:
     """
     Ensure both ships are docked at the same location.
     Returns True if successful, False otherwise.
     """
     try:
-        # Get ship locations and status
-        GLOBAL_RATE_LIMITER.wait_if_needed()
-        ship1_nav = client.get_ship_nav(ship1_symbol)
-        GLOBAL_RATE_LIMITER.wait_if_needed()
-        ship2_nav = client.get_ship_nav(ship2_symbol)
+        # Get ship locations and status, unless the caller already has them
+        if ships is None:
+            ships = get_ships(client, ship1_symbol, ship2_symbol)
+        ship1_nav, ship2_nav = (ship["data"]["nav"] for ship in ships)
 
         # Check if ships are at the same location
-        if ship1_nav["data"]["waypointSymbol"] != ship2_nav["data"]["waypointSymbol"]:
+        if ship1_nav["waypointSymbol"] != ship2_nav["waypointSymbol"]:
             print("Ships are not at the same location")
             return False
 
         # Dock ships if needed
-        if ship1_nav["data"]["status"] != "DOCKED":
+        if ship1_nav["status"] != "DOCKED":
             print(f"Docking {ship1_symbol}...")
-            GLOBAL_RATE_LIMITER.wait_if_needed()
             client.dock_ship(ship1_symbol)
 
-        if ship2_nav["data"]["status"] != "DOCKED":
+        if ship2_nav["status"] != "DOCKED":
             print(f"Docking {ship2_symbol}...")
-            GLOBAL_RATE_LIMITER.wait_if_needed()
             client.dock_ship(ship2_symbol)
 
         return True
 
     except ApiError as e:
-        if "429" in str(e):
-            print("Rate limit hit, waiting before retry...")
-            time.sleep(2)
-            return ensure_ships_docked(client, ship1_symbol, ship2_symbol)
+        # The client has already retried any 429 before it reaches here
         print(f"Error ensuring ships are docked: {str(e)}")
         return False
 
@@ -116,21 +71,20 @@ def transfer_cargo_between_ships(
     Returns True if any cargo was transferred.
     """
     try:
+        # One snapshot per ship covers both the docking check and the cargo
+        ships = get_ships(client, from_ship, to_ship)
+
         # Ensure ships are docked at same location
-        if not ensure_ships_docked(client, from_ship, to_ship):
+        if not ensure_ships_docked(client, from_ship, to_ship, ships):
             raise CoordinatedMiningError(
                 "Ships must be docked at the same location to transfer cargo"
             )
 
-        # Get cargo information with rate limiting
-        GLOBAL_RATE_LIMITER.wait_if_needed()
-        from_cargo = client.get_ship_cargo(from_ship)
-        GLOBAL_RATE_LIMITER.wait_if_needed()
-        to_cargo = client.get_ship_cargo(to_ship)
+        from_cargo, to_cargo = (ship["data"]["cargo"] for ship in ships)
 
         # Calculate available space in receiving ship
-        to_space = to_cargo["data"]["capacity"] - sum(
-            item["units"] for item in to_cargo["data"]["inventory"]
+        to_space = to_cargo["capacity"] - sum(
+            item["units"] for item in to_cargo["inventory"]
         )
 
         if to_space <= 0:
@@ -142,7 +96,7 @@ def transfer_cargo_between_ships(
 
         # Transfer cargo
         transferred = False
-        for item in from_cargo["data"]["inventory"]:
+        for item in from_cargo["inventory"]:
             # Skip if we're only transferring a specific cargo type
             if cargo_symbol and item["symbol"] != cargo_symbol:
                 continue
@@ -156,24 +110,7 @@ def transfer_cargo_between_ships(
                 continue
 
             print(f"Transferring {units_to_transfer} units of {item['symbol']}...")
-            max_transfer_retries = 3
-            transfer_retry = 0
-            while transfer_retry < max_transfer_retries:
-                try:
-                    GLOBAL_RATE_LIMITER.wait_if_needed()
-                    client.transfer_cargo(
-                        from_ship, to_ship, item["symbol"], units_to_transfer
-                    )
-                    break
-                except ApiError as e:
-                    if "429" in str(e) and transfer_retry < max_transfer_retries - 1:
-                        transfer_retry += 1
-                        print(
-                            f"Rate limit hit during transfer (attempt {transfer_retry}/{max_transfer_retries}), waiting..."
-                        )
-                        time.sleep(2 * transfer_retry)  # Exponential backoff
-                        continue
-                    raise
+            client.transfer_cargo(from_ship, to_ship, item["symbol"], units_to_transfer)
 
             transferred = True
 
@@ -188,48 +125,20 @@ def transfer_cargo_between_ships(
         return transferred
 
     except ApiError as e:
-        if "429" in str(e):
-            print("Rate limit hit during cargo transfer, waiting before retry...")
-            time.sleep(2)
-            return transfer_cargo_between_ships(
-                client, from_ship, to_ship, cargo_symbol, max_units
-            )
+        # The client has already retried any 429 before it reaches here
         print(f"Error transferring cargo: {str(e)}")
         return False
 
 
-def get_market_data_with_cache(
-    client: SpaceTradersClient,
-    system: str,
-    market_symbol: str,
-    market_cache: Dict[str, Any],
-    last_request_time: Dict[str, float],
-) -> Optional[Dict[str, Any]]:
-    """Get market data with caching and rate limiting"""
-    try:
-        # Check if we have cached data
-        if market_symbol in market_cache:
-            return market_cache[market_symbol]
-
-        # Rate limiting: ensure at least 500ms between requests
-        current_time = time.time()
-        if "last_time" in last_request_time:
-            time_since_last = current_time - last_request_time["last_time"]
-            if time_since_last < 0.5:  # 500ms
-                time.sleep(0.5 - time_since_last)
-
-        # Make the request
-        market_data = client.get_market(system, market_symbol)
-        market_cache[market_symbol] = market_data
-        last_request_time["last_time"] = time.time()
-
-        return market_data
-    except ApiError as e:
-        if "429" in str(e):  # Rate limit error
-            print(f"Rate limit hit, waiting before retry...")
-            time.sleep(1)  # Wait a second before potential retry
-        print(f"Error getting market data for {market_symbol}: {str(e)}")
-        return None
+def is_rate_limited(e: Exception) -> bool:
+    """Check whether an error is the API's 429 rate-limit response"""
+    return isinstance(e, ApiError) and e.status_code == 429
+
+
+def retry_delay(e: Exception, attempt: int = 1) -> float:
+    """Seconds to back off after a rate-limit error, using the client's cap"""
+    retry_after = e.retry_after if isinstance(e, ApiError) else None
+    return backoff_delay(retry_after, attempt, SpaceTradersClient.RETRY_DELAY_CAP)
 
 
 def handle_rate_limit(e: ApiError) -> bool:
@@ -237,98 +146,52 @@ def handle_rate_limit(e: ApiError) -> bool:
     Handle rate limit errors.
     Returns True if it was a rate limit error and handled, False otherwise.
     """
-    if "429" in str(e):
+    if is_rate_limited(e):
         print("Rate limit hit, waiting before retry...")
-        time.sleep(2)  # Increased wait time for rate limits
+        time.sleep(retry_delay(e))
         return True
     return False
 
 
-def with_rate_limit(func):
-    """Decorator to apply rate limiting and handle rate limit responses"""
-    rate_limiter = RateLimiter()
-
-    def wrapper(*args, **kwargs):
-        max_retries = 3
-        retry_count = 0
-
-        while retry_count < max_retries:
-            try:
-                # Wait for rate limit if needed
-                rate_limiter.wait_if_needed()
-
-                # Make the request
-                return func(*args, **kwargs)
-
-            except ApiError as e:
-                error_str = str(e)
-                if "429" in error_str:
-                    retry_count += 1
-                    # Try to get retry-after from headers if available
-                    retry_after = 1  # Default to 1 second
-                    if "retry-after" in error_str.lower():
-                        try:
-                            # Extract retry-after value from error message
-                            retry_after = int(
-                                error_str.split("retry-after: ")[1].split()[0]
-                            )
-                        except:
-                            pass
-
-                    print(
-                        f"Rate limit hit (attempt {retry_count}/{max_retries}). "
-                        f"Waiting {retry_after} seconds..."
-                    )
-                    time.sleep(retry_after)
-
-                    if retry_count >= max_retries:
-                        print("Max retries reached. Giving up.")
-                        raise
-                    continue
-                raise
-
-    return wrapper
-
-
-@with_rate_limit
+# The client already retries 429 responses, so these wrappers call it directly
 def get_ship_status(client: SpaceTradersClient, ship_symbol: str) -> Dict[str, Any]:
-    """Get ship nav status with rate limit handling"""
+    """Get ship nav status"""
     return client.get_ship_nav(ship_symbol)
 
 
-@with_rate_limit
+def get_ships(client: SpaceTradersClient, *ship_symbols: str) -> List[Dict[str, Any]]:
+    """Get several ships' details at once, in the order requested"""
+    with ThreadPoolExecutor(max_workers=len(ship_symbols)) as executor:
+        return list(executor.map(client.get_my_ship, ship_symbols))
+
+
 def get_ship_cargo(client: SpaceTradersClient, ship_symbol: str) -> Dict[str, Any]:
-    """Get ship cargo with rate limit handling"""
+    """Get ship cargo"""
     return client.get_ship_cargo(ship_symbol)
 
 
-@with_rate_limit
 def navigate_ship(
     client: SpaceTradersClient, ship_symbol: str, destination: str
 ) -> Dict[str, Any]:
-    """Navigate ship with rate limit handling"""
+    """Navigate ship"""
     return client.navigate_ship(ship_symbol, destination)
 
 
-@with_rate_limit
 def orbit_ship(client: SpaceTradersClient, ship_symbol: str) -> Dict[str, Any]:
-    """Put ship in orbit with rate limit handling"""
+    """Put ship in orbit"""
     return client.orbit_ship(ship_symbol)
 
 
-@with_rate_limit
 def dock_ship(client: SpaceTradersClient, ship_symbol: str) -> Dict[str, Any]:
-    """Dock ship with rate limit handling"""
+    """Dock ship"""
     return client.dock_ship(ship_symbol)
 
 
-@with_rate_limit
 def get_contracts(client: SpaceTradersClient) -> Dict[str, Any]:
-    """Get contracts with rate limit handling"""
+    """Get contracts"""
     return client.list_contracts()
 
 
-@with_rate_limit
 def deliver_contract(
     client: SpaceTradersClient,
     contract_id: str,
@@ -336,45 +199,40 @@ def deliver_contract(
     trade_symbol: str,
     units: int,
 ) -> Dict[str, Any]:
-    """Deliver contract with rate limit handling"""
+    """Deliver contract"""
     return client.deliver_contract(contract_id, ship_symbol, trade_symbol, units)
 
 
-@with_rate_limit
 def fulfill_contract(client: SpaceTradersClient, contract_id: str) -> Dict[str, Any]:
-    """Fulfill contract with rate limit handling"""
+    """Fulfill contract"""
     return client.fulfill_contract(contract_id)
 
 
-@with_rate_limit
 def get_market(
     client: SpaceTradersClient, system: str, waypoint: str
 ) -> Dict[str, Any]:
-    """Get market data with rate limit handling"""
+    """Get market data"""
     return client.get_market(system, waypoint)
 
 
-@with_rate_limit
 def jettison_cargo(
     client: SpaceTradersClient, ship_symbol: str, cargo_symbol: str, units: int
 ) -> Dict[str, Any]:
-    """Jettison cargo with rate limit handling"""
+    """Jettison cargo"""
     return client.jettison_cargo(ship_symbol, cargo_symbol, units)
 
 
-@with_rate_limit
 def sell_cargo(
     client: SpaceTradersClient, ship_symbol: str, cargo_symbol: str, units: int
 ) -> Dict[str, Any]:
-    """Sell cargo with rate limit handling"""
+    """Sell cargo"""
     return client.sell_cargo(ship_symbol, cargo_symbol, units)
 
 
-@with_rate_limit
 def set_flight_mode(
     client: SpaceTradersClient, ship_symbol: str, flight_mode: str
 ) -> Dict[str, Any]:
-    """Set ship flight mode with rate limit handling"""
+    """Set ship flight mode"""
     return client._make_request(
         "PATCH", f"my/ships/{ship_symbol}/nav", {"flightMode": flight_mode}
     )
@@ -404,7 +262,6 @@ def ensure_valid_navigation_state(
             print(f"Ship status is {current_status}, entering orbit...")
             try:
                 orbit_ship(client, ship_symbol)
-                time.sleep(1)  # Wait a moment for orbit status to update
             except ApiError as e:
                 if not handle_rate_limit(e):
                     print(f"Failed to enter orbit: {str(e)}")
@@ -415,7 +272,6 @@ def ensure_valid_navigation_state(
             print(f"Setting flight mode to CRUISE (current: {current_flight_mode})...")
             try:
                 set_flight_mode(client, ship_symbol, "CRUISE")
-                time.sleep(1)  # Wait a moment for flight mode to update
             except ApiError as e:
                 if not handle_rate_limit(e):
                     print(f"Failed to set flight mode: {str(e)}")
@@ -484,9 +340,6 @@ class CoordinatedMiningState:
     """State management for coordinated mining to reduce API calls"""
 
     def __init__(self):
-        self.waypoints_cache: Dict[str, List[Dict[str, Any]]] = (
-            {}
-        )  # Cache of system waypoints
         self.market_cache: Dict[str, Dict[str, Any]] = {}  # Cache of market data
         self.ship_status_cache: Dict[str, Dict[str, Any]] = {}  # Cache of ship status
         self.ship_cargo_cache: Dict[str, Dict[str, Any]] = {}  # Cache of ship cargo
@@ -546,33 +399,8 @@ class CoordinatedMiningState:
     def get_system_waypoints(
         self, client: SpaceTradersClient, system: str
     ) -> List[Dict[str, Any]]:
-        """Get system waypoints with caching"""
-        if system in self.waypoints_cache and self.is_cache_valid(
-            f"waypoints_{system}"
-        ):
-            return self.waypoints_cache[system]
-
-        all_waypoints = []
-        page = 1
-        while True:
-            try:
-                response = client._make_request(
-                    "GET", f"systems/{system}/waypoints?page={page}"
-                )
-                all_waypoints.extend(response["data"])
-                if page * 10 >= response["meta"]["total"]:
-                    break
-                page += 1
-                time.sleep(0.5)  # Rate limiting
-            except ApiError as e:
-                if "429" in str(e):
-                    time.sleep(2)
-                    continue
-                raise
-
-        self.waypoints_cache[system] = all_waypoints
-        self.update_cache(f"waypoints_{system}")
-        return all_waypoints
+        """Get system waypoints from the client's shared waypoint cache"""
+        return client.list_all_waypoints(system)
 
 
 def ensure_ship_ready_for_navigation(client, ship_symbol):
@@ -599,9 +427,8 @@ def ensure_ship_ready_for_navigation(client, ship_symbol):
         if nav["status"] == "DOCKED":
             client.orbit_ship(ship_symbol)
         else:
-            # Wait for any in-progress navigation to complete
-            wait_for_arrival(client, ship_symbol)
-            client.orbit_ship(ship_symbol)
+            # Sleep until the reported arrival; ships land in orbit
+            wait_for_arrival(client, ship_symbol, nav)
 
     # Ensure flight mode is CRUISE
     if nav["flightMode"] != "CRUISE":
@@ -625,7 +452,6 @@ def get_contract_resource_needs(
 ) -> List[Dict[str, Any]]:
     """Get the remaining resources needed for a contract."""
     try:
-        GLOBAL_RATE_LIMITER.wait_if_needed()
         contract = client.get_contract(contract_id)
         needed_resources = []
 
@@ -649,7 +475,6 @@ def get_contract_resource_needs(
 def get_active_contract(client: SpaceTradersClient) -> Optional[str]:
     """Get the active contract ID if one exists."""
     try:
-        GLOBAL_RATE_LIMITER.wait_if_needed()
         contracts = client.list_contracts()
         # Find the first active and accepted contract
         for contract in contracts["data"]:
@@ -661,6 +486,28 @@ def get_active_contract(client: SpaceTradersClient) -> Optional[str]:
         return None
 
 
+def find_contract_targets(
+    client: SpaceTradersClient,
+) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """Get the active contract ID and the deliveries it still needs."""
+    contract_id = get_active_contract(client)
+    if not contract_id:
+        print("No active contract found.")
+        return None, []
+
+    contract_needs = get_contract_resource_needs(client, contract_id)
+    if not contract_needs:
+        print(f"No remaining deliveries needed for contract {contract_id}.")
+        return None, []
+
+    print(f"\nContract {contract_id} needs:")
+    for need in contract_needs:
+        print(
+            f"- {need['units_needed']} units of {need['symbol']} to be delivered to {need['destination']}"
+        )
+    return contract_id, contract_needs
+
+
 class MiningSession:
     """Track mining session statistics"""
 
@@ -721,32 +568,15 @@ def coordinate_mining(
     session = MiningSession()
 
     # Initialize contract tracking
-    active_contract = get_active_contract(client)
-    target_resources = []
-
-    if active_contract:
-        contract_needs = get_contract_resource_needs(client, active_contract)
-        if contract_needs:
-            print(f"\nContract {active_contract} needs:")
-            for need in contract_needs:
-                print(
-                    f"- {need['units_needed']} units of {need['symbol']} to be delivered to {need['destination']}"
-                )
-            target_resources = contract_needs
-        else:
-            print("No remaining deliveries needed for current contract.")
-            active_contract = None
-    else:
-        print("No active contract found.")
+    active_contract, target_resources = find_contract_targets(client)
 
     try:
         while True:
             try:
-                # Get ship statuses with rate limiting
-                GLOBAL_RATE_LIMITER.wait_if_needed()
-                command_ship = client.get_my_ship(command_ship_symbol)
-                GLOBAL_RATE_LIMITER.wait_if_needed()
-                mining_drone = client.get_my_ship(mining_drone_symbol)
+                # Get ship statuses; the two lookups are independent
+                command_ship, mining_drone = get_ships(
+                    client, command_ship_symbol, mining_drone_symbol
+                )
 
                 # Check mining drone cargo status first
                 mining_drone_cargo = mining_drone["data"]["cargo"]
@@ -784,42 +614,20 @@ def coordinate_mining(
                                     target_resources,
                                     session,
                                 )
-                                if delivered:
-                                    # Check if we need to get a new contract
-                                    if not target_resources:
-                                        print(
-                                            "Contract completed. Looking for new contract..."
-                                        )
-                                        active_contract = get_active_contract(client)
-                                        if active_contract:
-                                            contract_needs = (
-                                                get_contract_resource_needs(
-                                                    client, active_contract
-                                                )
-                                            )
-                                            if contract_needs:
-                                                print(
-                                                    f"\nNew contract {active_contract} needs:"
-                                                )
-                                                for need in contract_needs:
-                                                    print(
-                                                        f"- {need['units_needed']} units of {need['symbol']} to be delivered to {need['destination']}"
-                                                    )
-                                                target_resources = contract_needs
-                                            else:
-                                                print(
-                                                    "No deliveries needed for new contract."
-                                                )
-                                                active_contract = None
-                                        else:
-                                            print("No new contract found.")
+                                # Check if we need to get a new contract
+                                if delivered and not target_resources:
+                                    print(
+                                        "Contract completed. Looking for new contract..."
+                                    )
+                                    active_contract, target_resources = (
+                                        find_contract_targets(client)
+                                    )
                             except Exception as e:
                                 print(f"Failed to deliver contract resources: {str(e)}")
-                                if "429" in str(e):
-                                    time.sleep(2)
+                                if is_rate_limited(e):
+                                    time.sleep(retry_delay(e))
 
                         # If still full after delivery, try to sell excess at best market
-                        GLOBAL_RATE_LIMITER.wait_if_needed()
                         command_ship = client.get_my_ship(command_ship_symbol)
                         command_cargo = command_ship["data"]["cargo"]
                         if command_cargo["units"] > 0:
@@ -828,8 +636,8 @@ def coordinate_mining(
                                 sell_cargo_at_best_market(client, command_ship_symbol)
                             except Exception as e:
                                 print(f"Failed to sell cargo: {str(e)}")
-                                if "429" in str(e):
-                                    time.sleep(2)
+                                if is_rate_limited(e):
+                                    time.sleep(retry_delay(e))
 
                         # Skip transfer attempt this iteration
                         print(
@@ -851,41 +659,29 @@ def coordinate_mining(
                             f"Command ship at {command_ship_nav['waypointSymbol']}, navigating to mining drone at {mining_drone_nav['waypointSymbol']}"
                         )
                         try:
-                            GLOBAL_RATE_LIMITER.wait_if_needed()
                             navigate_to_waypoint(
                                 client,
                                 command_ship_symbol,
                                 mining_drone_nav["waypointSymbol"],
                             )
                         except ApiError as e:
-                            if "429" in str(e):
+                            if is_rate_limited(e):
                                 print("Rate limit hit during navigation, waiting...")
-                                time.sleep(2)
+                                time.sleep(retry_delay(e))
                                 continue
                             raise
 
-                    # Transfer cargo with rate limiting and retries
-                    max_transfer_retries = 3
-                    transfer_retry = 0
-                    transfer_successful = False
-                    while transfer_retry < max_transfer_retries:
-                        try:
-                            transfer_successful = transfer_cargo_between_ships(
-                                client, mining_drone_symbol, command_ship_symbol
-                            )
-                            break
-                        except ApiError as e:
-                            if (
-                                "429" in str(e)
-                                and transfer_retry < max_transfer_retries - 1
-                            ):
-                                transfer_retry += 1
-                                print(
-                                    f"Rate limit hit during transfer (attempt {transfer_retry}/{max_transfer_retries}), waiting..."
-                                )
-                                time.sleep(2 * transfer_retry)  # Exponential backoff
-                                continue
-                            raise
+                    # Rate limits are retried by the client, and transfer
+                    # failures come back as False rather than an ApiError
+                    transfer_successful = transfer_cargo_between_ships(
+                        client, mining_drone_symbol, command_ship_symbol
+                    )
+                    if not transfer_successful:
+                        # The drone is still full and will not mine, so wait
+                        # rather than retry the transfer straight away
+                        print("Cargo transfer failed. Waiting before retrying...")
+                        time.sleep(5)
+                        continue
 
                     # After successful transfer, attempt contract delivery if we have an active contract
                     if transfer_successful and active_contract:
@@ -893,7 +689,6 @@ def coordinate_mining(
                             "Transfer complete. Command ship handling contract delivery while mining drone continues..."
                         )
                         try:
-                            GLOBAL_RATE_LIMITER.wait_if_needed()
                             command_ship = client.get_my_ship(command_ship_symbol)
                             command_cargo = command_ship["data"]["cargo"]
 
@@ -909,43 +704,20 @@ def coordinate_mining(
                                         target_resources,
                                         session,
                                     )
-                                    if delivered:
-                                        # Check if we need to get a new contract
-                                        if not target_resources:
-                                            print(
-                                                "Contract completed. Looking for new contract..."
-                                            )
-                                            active_contract = get_active_contract(
-                                                client
-                                            )
-                                            if active_contract:
-                                                contract_needs = (
-                                                    get_contract_resource_needs(
-                                                        client, active_contract
-                                                    )
-                                                )
-                                                if contract_needs:
-                                                    print(
-                                                        f"\nNew contract {active_contract} needs:"
-                                                    )
-                                                    for need in contract_needs:
-                                                        print(
-                                                            f"- {need['units_needed']} units of {need['symbol']} to be delivered to {need['destination']}"
-                                                        )
-                                                    target_resources = contract_needs
-                                                else:
-                                                    print(
-                                                        "No deliveries needed for new contract."
-                                                    )
-                                                    active_contract = None
-                                            else:
-                                                print("No new contract found.")
+                                    # Check if we need to get a new contract
+                                    if delivered and not target_resources:
+                                        print(
+                                            "Contract completed. Looking for new contract..."
+                                        )
+                                        active_contract, target_resources = (
+                                            find_contract_targets(client)
+                                        )
                                 except Exception as e:
                                     print(
                                         f"Failed to deliver contract resources: {str(e)}"
                                     )
-                                    if "429" in str(e):
-                                        time.sleep(2)
+                                    if is_rate_limited(e):
+                                        time.sleep(retry_delay(e))
                         except Exception as e:
                             print(
                                 f"Error checking command ship after transfer: {str(e)}"
@@ -959,7 +731,6 @@ def coordinate_mining(
                     try:
                         # Ensure drone is in orbit for mining
                         if mining_drone["data"]["nav"]["status"] != "IN_ORBIT":
-                            GLOBAL_RATE_LIMITER.wait_if_needed()
                             try:
                                 client.orbit_ship(mining_drone_symbol)
                             except ApiError as e:
@@ -967,30 +738,28 @@ def coordinate_mining(
                                     raise
 
                         # Start mining operation
-                        GLOBAL_RATE_LIMITER.wait_if_needed()
                         try:
                             mining_result = client.extract_resources(
                                 mining_drone_symbol
                             )
                         except ApiError as e:
-                            if "409" in str(e):
-                                if "must be in orbit" in str(e).lower():
-                                    print(
-                                        "Ship must be in orbit to mine. Entering orbit..."
-                                    )
-                                    client.orbit_ship(mining_drone_symbol)
-                                    mining_result = client.extract_resources(
-                                        mining_drone_symbol
-                                    )
-                                else:
-                                    raise
-                            elif "429" in str(e):
+                            if is_not_in_orbit(e):
+                                print(
+                                    "Ship must be in orbit to mine. Entering orbit..."
+                                )
+                                client.orbit_ship(mining_drone_symbol)
+                                mining_result = client.extract_resources(
+                                    mining_drone_symbol
+                                )
+                            elif is_rate_limited(e):
                                 print("Rate limit hit during mining, waiting...")
-                                time.sleep(2)
+                                time.sleep(retry_delay(e))
                                 continue
-                            elif "cooldown" in str(e).lower():
+                            elif is_cooldown_conflict(e):
                                 print("Mining is on cooldown, waiting...")
-                                time.sleep(5)
+                                wait_for_cooldown(
+                                    client, mining_drone_symbol, refresh=True
+                                )
                                 continue
                             else:
                                 raise
@@ -1001,6 +770,9 @@ def coordinate_mining(
                         print(
                             f"Extracted {yield_data['units']} units of {yield_data['symbol']}"
                         )
+                        session.add_mined_resource(
+                            yield_data["symbol"], yield_data["units"]
+                        )
 
                         # Check if this resource is needed for the contract
                         for resource in target_resources:
@@ -1010,58 +782,28 @@ def coordinate_mining(
                                 )
                                 break
 
-                        # Wait for cooldown
-                        cooldown = mining_result["data"]["cooldown"]["remainingSeconds"]
-                        if cooldown > 0:
-                            print(f"Mining cooldown: {cooldown} seconds")
-                            time.sleep(cooldown)
+                        # Wait until the cooldown reported by the extraction expires
+                        sleep_until_cooldown_expires(mining_result["data"]["cooldown"])
 
                     except ApiError as e:
-                        if "429" in str(e):
+                        if is_rate_limited(e):
                             print("Rate limit hit during mining, waiting...")
-                            time.sleep(2)
-                        elif "cooldown" in str(e).lower():
+                            time.sleep(retry_delay(e))
+                        elif is_cooldown_conflict(e):
                             print("Mining is on cooldown, waiting...")
-                            time.sleep(5)
+                            wait_for_cooldown(client, mining_drone_symbol, refresh=True)
                         else:
                             print(f"Mining error: {str(e)}")
                             time.sleep(5)
 
-                # Sleep briefly between iterations
-                time.sleep(1)
-
-                # Update session stats for mining
-                if "mining_result" in locals():
-                    yield_data = mining_result["data"]["extraction"]["yield"]
-                    session.add_mined_resource(
-                        yield_data["symbol"], yield_data["units"]
-                    )
-
-                # Update session stats for delivery
-                if "deliver_result" in locals():
-                    delivery = deliver_result["data"]["cargo"]
-                    session.add_delivered_resource(
-                        delivery["tradeSymbol"], delivery["units"]
-                    )
-
-                # Update session stats for contract completion
-                if "fulfill_result" in locals():
-                    payment = fulfill_result["data"]["contract"]["terms"]["payment"]
-                    session.add_contract_completed(payment["onFulfilled"])
-
-                # Clear the local variables to avoid double counting
-                if "mining_result" in locals():
-                    del mining_result
-                if "deliver_result" in locals():
-                    del deliver_result
-                if "fulfill_result" in locals():
-                    del fulfill_result
-
+                # No fixed sleep here: every path above already waits on the
+                # extraction cooldown, a failed transfer's pause or an explicit
+                # back-off before looping.
             except Exception as e:
                 print(f"Error in mining coordination: {str(e)}")
-                if "429" in str(e):
+                if is_rate_limited(e):
                     print("Rate limit hit, waiting before retry...")
-                    time.sleep(2)
+                    time.sleep(retry_delay(e))
                 else:
                     time.sleep(5)  # Wait longer for non-rate-limit errors
                 continue
@@ -1077,65 +819,39 @@ def coordinate_mining(
         raise
 
 
-def find_best_market_for_cargo(
-    client: SpaceTradersClient, ship_symbol: str, cargo_symbol: str
-) -> Optional[str]:
-    """Find the best market to sell a specific cargo type."""
+def find_best_markets_for_cargo(
+    client: SpaceTradersClient, system: str, cargo_symbols: List[str]
+) -> Dict[str, str]:
+    """Find the best market to sell each cargo type, keyed by cargo symbol."""
     try:
-        # Get current ship location
-        ship = client.get_my_ship(ship_symbol)
-        current_system = ship["data"]["nav"]["systemSymbol"]
-
-        # Get all waypoints in the system
-        waypoints = []
-        page = 1
-        while True:
-            response = client._make_request(
-                "GET", f"systems/{current_system}/waypoints?page={page}"
+        # Fetch every marketplace in the system once, in parallel
+        markets = client.get_system_markets(system)
+
+        # Single sweep over the markets, keeping the best sell price per good
+        wanted = set(cargo_symbols)
+        best: Dict[str, Tuple[int, str]] = {}
+        for market_symbol, market_data in markets.items():
+            # Only markets that import a good are guaranteed to buy it
+            imported = wanted.intersection(
+                item["symbol"] for item in market_data.get("imports", [])
             )
-            waypoints.extend(response["data"])
-            if page * 20 >= response["meta"]["total"]:
-                break
-            page += 1
-            time.sleep(0.5)  # Rate limiting
-
-        # Find markets
-        best_price = 0
-        best_market = None
-
-        for waypoint in waypoints:
-            if any(
-                trait["symbol"] == "MARKETPLACE" for trait in waypoint.get("traits", [])
-            ):
-                try:
-                    market = client.get_market(current_system, waypoint["symbol"])
-                    market_data = market["data"]
-
-                    # First check if this market imports our cargo
-                    imports = [
-                        item["symbol"] for item in market_data.get("imports", [])
-                    ]
-                    if cargo_symbol in imports:
-                        # If it's an import, we know they'll buy it
-                        # Check trade goods for price if available
-                        for trade_good in market_data.get("tradeGoods", []):
-                            if trade_good["symbol"] == cargo_symbol:
-                                if trade_good.get("sellPrice", 0) > best_price:
-                                    best_price = trade_good["sellPrice"]
-                                    best_market = waypoint["symbol"]
-                                break
-                        # If we found it in imports but not in trade goods, still consider it
-                        if not best_market:
-                            best_market = waypoint["symbol"]
-
-                except ApiError:
-                    continue
-                time.sleep(0.5)  # Rate limiting
+            if not imported:
+                continue
 
-        return best_market
+            prices = {
+                trade_good["symbol"]: trade_good.get("sellPrice", 0)
+                for trade_good in market_data.get("tradeGoods", [])
+            }
+            for cargo_symbol in imported:
+                # An import without a listed price still beats having no market
+                price = prices.get(cargo_symbol, 0)
+                if cargo_symbol not in best or price > best[cargo_symbol][0]:
+                    best[cargo_symbol] = (price, market_symbol)
+
+        return {cargo_symbol: market for cargo_symbol, (_, market) in best.items()}
     except ApiError as e:
         print(f"Error finding market: {str(e)}")
-        return None
+        return {}
 
 
 def sell_cargo_at_best_market(client: SpaceTradersClient, ship_symbol: str) -> None:
@@ -1144,20 +860,23 @@ def sell_cargo_at_best_market(client: SpaceTradersClient, ship_symbol: str) -> N
         # Get ship's cargo
         ship = client.get_my_ship(ship_symbol)
         cargo = ship["data"]["cargo"]
+        nav = ship["data"]["nav"]
+        system = nav["systemSymbol"]
 
         if cargo["units"] == 0:
             print("No cargo to sell")
             return
 
-        # Try to sell each cargo type at the best market
-        for item in cargo["inventory"]:
-            print(
-                f"\nFinding best market for {item['units']} units of {item['symbol']}..."
-            )
+        # Look up the best market for every cargo type in one pass
+        print("\nFinding best markets for cargo...")
+        best_markets = find_best_markets_for_cargo(
+            client, system, [item["symbol"] for item in cargo["inventory"]]
+        )
 
-            best_market = find_best_market_for_cargo(
-                client, ship_symbol, item["symbol"]
-            )
+        # Group the sales by market so each market is visited only once
+        sales_by_market: Dict[str, List[Dict[str, Any]]] = {}
+        for item in cargo["inventory"]:
+            best_market = best_markets.get(item["symbol"])
             if not best_market:
                 print(f"No market found for {item['symbol']}, jettisoning cargo...")
                 try:
@@ -1169,35 +888,50 @@ def sell_cargo_at_best_market(client: SpaceTradersClient, ship_symbol: str) -> N
                     print(f"Failed to jettison {item['symbol']}: {str(e)}")
                 continue
 
-            print(f"Best market found at {best_market}")
+            print(f"Best market for {item['symbol']} found at {best_market}")
+            sales_by_market.setdefault(best_market, []).append(item)
+
+        # Visit the markets nearest first, starting with the current waypoint
+        current_location = nav["waypointSymbol"]
+        start = client.find_waypoint(system, current_location)
+        market_order = list(sales_by_market)
+        if start is not None:
+            market_order.sort(
+                key=lambda market: distance_between(
+                    client.find_waypoint(system, market), start["x"], start["y"]
+                )
+            )
 
+        for market in market_order:
             # Navigate to market if needed
-            current_location = ship["data"]["nav"]["waypointSymbol"]
-            if current_location != best_market:
-                print(f"Navigating to {best_market}...")
-                navigate_to_waypoint(client, ship_symbol, best_market)
+            if current_location != market:
+                print(f"Navigating to {market}...")
+                navigate_to_waypoint(client, ship_symbol, market)
+                current_location = market
 
-            # Dock and sell
+            # Dock once, then sell everything bound for this market
             print("Docking at market...")
             client.dock_ship(ship_symbol)
 
-            try:
-                result = client.sell_cargo(ship_symbol, item["symbol"], item["units"])
-                transaction = result["data"]["transaction"]
-                print(
-                    f"Sold {transaction['units']} units of {transaction['tradeSymbol']} "
-                    f"for {transaction['totalPrice']} credits"
-                )
-            except ApiError as e:
-                print(f"Failed to sell {item['symbol']}, attempting to jettison...")
+            for item in sales_by_market[market]:
                 try:
-                    result = client.jettison_cargo(
+                    result = client.sell_cargo(
                         ship_symbol, item["symbol"], item["units"]
                     )
-                    print(f"Jettisoned {item['units']} units of {item['symbol']}")
-                except ApiError as e2:
-                    print(f"Failed to jettison {item['symbol']}: {str(e2)}")
-                continue
+                    transaction = result["data"]["transaction"]
+                    print(
+                        f"Sold {transaction['units']} units of {transaction['tradeSymbol']} "
+                        f"for {transaction['totalPrice']} credits"
+                    )
+                except ApiError as e:
+                    print(f"Failed to sell {item['symbol']}, attempting to jettison...")
+                    try:
+                        result = client.jettison_cargo(
+                            ship_symbol, item["symbol"], item["units"]
+                        )
+                        print(f"Jettisoned {item['units']} units of {item['symbol']}")
+                    except ApiError as e2:
+                        print(f"Failed to jettison {item['symbol']}: {str(e2)}")
 
     except ApiError as e:
         print(f"Error selling cargo: {str(e)}")
@@ -1273,7 +1007,6 @@ def deliver_contract_resources(
                 try:
                     print("Docking ship for delivery...")
                     client.dock_ship(ship_symbol)
-                    time.sleep(1)  # Wait a moment for dock status to update
                 except ApiError as e:
                     if not handle_state_conflict(e):
                         print(f"Failed to dock: {str(e)}")
@@ -1307,15 +1040,14 @@ def deliver_contract_resources(
                         delivery["tradeSymbol"], units_to_deliver
                     )
 
+                # The delivery response already carries the updated contract
+                contract = {"data": deliver_result["data"]["contract"]}
+
                 # Update target_resources if provided
                 if target_resources is not None:
-                    # Get updated contract info
-                    updated_contract = client.get_contract(contract_id)
                     # Update target_resources with new requirements
                     target_resources.clear()
-                    for updated_delivery in updated_contract["data"]["terms"][
-                        "deliver"
-                    ]:
+                    for updated_delivery in contract["data"]["terms"]["deliver"]:
                         updated_remaining = updated_delivery[
                             "unitsRequired"
                         ] - updated_delivery.get("unitsFulfilled", 0)
@@ -1331,7 +1063,6 @@ def deliver_contract_resources(
                             )
 
                 # Check if contract is fulfilled
-                contract = client.get_contract(contract_id)
                 if all(
                     item.get("unitsFulfilled", 0) >= item["unitsRequired"]
                     for item in contract["data"]["terms"]["deliver"]
@@ -1353,36 +1084,32 @@ def deliver_contract_resources(
                             print(f"Failed to fulfill contract: {str(e)}")
 
             except ApiError as e:
-                if "409" in str(e):
-                    if "must be docked" in str(e).lower():
-                        print("Ship must be docked for delivery. Attempting to dock...")
-                        try:
-                            client.dock_ship(ship_symbol)
-                            # Retry delivery
-                            deliver_result = client.deliver_contract(
-                                contract_id,
-                                ship_symbol,
-                                delivery["tradeSymbol"],
-                                units_to_deliver,
-                            )
-                            print(
-                                f"Successfully delivered {units_to_deliver} units of {delivery['tradeSymbol']}"
-                            )
-                            delivered_something = True
+                if is_not_docked(e):
+                    print("Ship must be docked for delivery. Attempting to dock...")
+                    try:
+                        client.dock_ship(ship_symbol)
+                        # Retry delivery
+                        deliver_result = client.deliver_contract(
+                            contract_id,
+                            ship_symbol,
+                            delivery["tradeSymbol"],
+                            units_to_deliver,
+                        )
+                        print(
+                            f"Successfully delivered {units_to_deliver} units of {delivery['tradeSymbol']}"
+                        )
+                        delivered_something = True
 
-                            # Track delivery in session if provided
-                            if session is not None:
-                                session.add_delivered_resource(
-                                    delivery["tradeSymbol"], units_to_deliver
-                                )
+                        # Track delivery in session if provided
+                        if session is not None:
+                            session.add_delivered_resource(
+                                delivery["tradeSymbol"], units_to_deliver
+                            )
 
-                        except ApiError as e2:
-                            if not handle_state_conflict(e2):
-                                print(f"Delivery failed: {str(e2)}")
-                                continue
-                    else:
-                        print(f"Delivery failed: {str(e)}")
-                        continue
+                    except ApiError as e2:
+                        if not handle_state_conflict(e2):
+                            print(f"Delivery failed: {str(e2)}")
+                            continue
                 else:
                     print(f"Delivery failed: {str(e)}")
                     continue
@@ -1396,19 +1123,10 @@ def deliver_contract_resources(
 
 def handle_state_conflict(e: ApiError) -> bool:
     """
-    Handle 409 conflict errors by fixing the ship's state.
-    Returns True if it was a conflict error and handled, False otherwise.
+    Handle errors caused by the ship's nav state, such as being in transit.
+    Returns True if it was a state conflict and handled, False otherwise.
     """
-    if "409" in str(e):
+    if e.error_code in SHIP_STATE_ERRORS:
         print("State conflict detected. Attempting to fix...")
-        if "must be docked" in str(e).lower():
-            return True
-        elif "must be in orbit" in str(e).lower():
-            return True
-        elif "already in orbit" in str(e).lower():
-            return True
-        elif "already docked" in str(e).lower():
-            return True
-        elif "in transit" in str(e).lower():
-            return True
+        return True
     return False
@@ -1,7 +1,31 @@
+import random
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from client import ApiError, SpaceTradersClient
+from client import (ApiError, SpaceTradersClient, distance_between,
+                    system_symbol_of)
+
+# Progress update interval and jittered post-ETA polling back-off for ships in transit
+ARRIVAL_UPDATE_INTERVAL = 30
+ARRIVAL_POLL_START = 0.5
+ARRIVAL_POLL_CAP = 4
+ARRIVAL_POLL_JITTER = 0.5
+
+# Monotonic time each ship's last reported cooldown ends
+cooldown_expiries: Dict[str, float] = {}
+
+# Every mining laser mount symbol starts with this, whatever its tier
+MINING_LASER_PREFIX = "MOUNT_MINING_LASER"
+
+# SpaceTraders error codes for ship actions rejected because of the ship's state
+COOLDOWN_CONFLICT_ERROR = 4000
+SHIP_IN_TRANSIT_ERROR = 4214
+SHIP_NOT_IN_ORBIT_ERROR = 4236
+SHIP_NOT_DOCKED_ERROR = 4244
+SHIP_STATE_ERRORS = frozenset(
+    {SHIP_IN_TRANSIT_ERROR, SHIP_NOT_IN_ORBIT_ERROR, SHIP_NOT_DOCKED_ERROR}
+)
 
 
 class MiningError(Exception):
@@ -10,60 +34,111 @@ class MiningError(Exception):
     pass
 
 
-def wait_for_cooldown(client: SpaceTradersClient, ship_symbol: str) -> None:
-    """Wait for ship's cooldown to complete"""
+def has_mining_laser(ship: Dict[str, Any]) -> bool:
+    """Whether a ship has at least one mining laser mounted"""
+    return any(
+        mount["symbol"].startswith(MINING_LASER_PREFIX) for mount in ship["mounts"]
+    )
+
+
+def is_cooldown_conflict(e: ApiError) -> bool:
+    """Whether an error is the API's 409 for an action still on cooldown"""
+    return e.status_code == 409 and e.error_code == COOLDOWN_CONFLICT_ERROR
+
+
+def is_not_in_orbit(e: ApiError) -> bool:
+    """Whether an error says the ship must be in orbit for the action"""
+    # The error code alone identifies this, whatever the HTTP status
+    return e.error_code == SHIP_NOT_IN_ORBIT_ERROR
+
+
+def is_not_docked(e: ApiError) -> bool:
+    """Whether an error says the ship must be docked for the action"""
+    return e.error_code == SHIP_NOT_DOCKED_ERROR
+
+
+def seconds_until(timestamp: str) -> float:
+    """Seconds from now until an ISO-8601 timestamp returned by the API"""
+    target = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    return (target - datetime.now(target.tzinfo)).total_seconds()
+
+
+def cooldown_remaining(cooldown: Dict[str, Any]) -> float:
+    """Seconds left on a cooldown object returned by the API"""
+    if cooldown.get("expiration"):
+        return seconds_until(cooldown["expiration"])
+    return cooldown.get("remainingSeconds", 0)
+
+
+def record_cooldown(ship_symbol: str, cooldown: Dict[str, Any]) -> None:
+    """Remember when a ship's cooldown ends so later waits need no request"""
+    cooldown_expiries[ship_symbol] = time.monotonic() + cooldown_remaining(cooldown)
+
+
+def sleep_for_cooldown(remaining: float) -> None:
+    """Sleep out the remaining seconds of a cooldown"""
+    if remaining > 0:
+        print(f"Cooling down... {int(remaining)} seconds remaining")
+        time.sleep(remaining + 1)  # Add 1 second buffer
+
+
+def sleep_until_cooldown_expires(cooldown: Dict[str, Any]) -> None:
+    """Sleep until the expiration of a cooldown object returned by the API"""
+    sleep_for_cooldown(cooldown_remaining(cooldown))
+
+
+def wait_for_cooldown(
+    client: SpaceTradersClient, ship_symbol: str, refresh: bool = False
+) -> None:
+    """Wait for ship's cooldown to complete, asking the API only if unknown"""
+    expiry = cooldown_expiries.get(ship_symbol)
+    if expiry is not None and not refresh:
+        sleep_for_cooldown(expiry - time.monotonic())
+        return
+
     try:
         cooldown = client.get_ship_cooldown(ship_symbol)
-        if "data" in cooldown and cooldown["data"].get("remainingSeconds", 0) > 0:
-            remaining = cooldown["data"]["remainingSeconds"]
-            print(f"Cooling down... {remaining} seconds remaining")
-            time.sleep(remaining + 1)  # Add 1 second buffer
+        if cooldown.get("data"):
+            record_cooldown(ship_symbol, cooldown["data"])
+            sleep_until_cooldown_expires(cooldown["data"])
     except ApiError:
         # If we can't get cooldown, assume no cooldown
         pass
 
 
 def find_nearest_asteroid_field(
-    client: SpaceTradersClient, ship_symbol: str, resource_type: Optional[str] = None
+    client: SpaceTradersClient,
+    ship_symbol: str,
+    resource_type: Optional[str] = None,
+    nav: Optional[Dict[str, Any]] = None,
 ) -> Optional[Dict[str, Any]]:
     """
     Find the nearest asteroid field to the ship's current location,
     prioritizing asteroids with metal deposits
     """
     try:
-        # Get ship's current location
-        nav = client.get_ship_nav(ship_symbol)
-        current_system = nav["data"]["systemSymbol"]
-        current_waypoint = nav["data"]["waypointSymbol"]
+        # Get ship's current location unless the caller already has it
+        if nav is None:
+            nav = client.get_ship_nav(ship_symbol)["data"]
+        current_system = nav["systemSymbol"]
+        current_waypoint = nav["waypointSymbol"]
 
         print(f"Current system: {current_system}")
         print(f"Current location: {current_waypoint}")
 
         # Get all waypoints in the system with pagination
         print("\nSearching for asteroid fields...")
-        all_waypoints = []
-        page = 1
-        while True:
-            response = client._make_request(
-                "GET", f"systems/{current_system}/waypoints?page={page}"
-            )
-            all_waypoints.extend(response["data"])
-            if page * 10 >= response["meta"]["total"]:
-                break
-            page += 1
+        all_waypoints = client.list_all_waypoints(current_system)
 
         print(f"Found {len(all_waypoints)} waypoints in system")
 
         # First, look for engineered asteroids with metal deposits
         print("\nLooking for engineered asteroids with metal deposits...")
+        metal_deposits = client.find_waypoints_with_trait(
+            current_system, "COMMON_METAL_DEPOSITS"
+        )
         engineered_asteroids = [
-            wp
-            for wp in all_waypoints
-            if wp["type"] == "ENGINEERED_ASTEROID"
-            and any(
-                trait["symbol"] == "COMMON_METAL_DEPOSITS"
-                for trait in wp.get("traits", [])
-            )
+            wp for wp in metal_deposits if wp["type"] == "ENGINEERED_ASTEROID"
         ]
 
         if engineered_asteroids:
@@ -76,67 +151,47 @@ def find_nearest_asteroid_field(
 
         # Next, look for regular asteroids with metal deposits
         print("\nLooking for regular asteroids with metal deposits...")
-        metal_asteroids = [
-            wp
-            for wp in all_waypoints
-            if wp["type"] == "ASTEROID"
-            and any(
-                trait["symbol"] == "COMMON_METAL_DEPOSITS"
-                for trait in wp.get("traits", [])
-            )
-        ]
+        metal_asteroids = [wp for wp in metal_deposits if wp["type"] == "ASTEROID"]
 
         if metal_asteroids:
             # Find the closest one to current location
-            current_x = next(
-                wp["x"] for wp in all_waypoints if wp["symbol"] == current_waypoint
-            )
-            current_y = next(
-                wp["y"] for wp in all_waypoints if wp["symbol"] == current_waypoint
-            )
+            current = client.find_waypoint(current_system, current_waypoint)
+            current_x, current_y = current["x"], current["y"]
 
-            # Sort by distance
-            metal_asteroids.sort(
-                key=lambda wp: ((wp["x"] - current_x) ** 2 + (wp["y"] - current_y) ** 2)
-                ** 0.5
+            # Only the closest is needed, so skip sorting the whole list
+            target = min(
+                metal_asteroids,
+                key=lambda wp: distance_between(wp, current_x, current_y),
             )
-
-            target = metal_asteroids[0]
             print(f"Found metal-rich asteroid: {target['symbol']}")
             print("Asteroid traits:")
             for trait in target["traits"]:
                 print(f"- {trait['name']}: {trait['description']}")
             print(
-                f"Distance: {int(((target['x'] - current_x) ** 2 + (target['y'] - current_y) ** 2) ** 0.5)} units"
+                f"Distance: {int(distance_between(target, current_x, current_y))} units"
             )
             return target
 
         # If no metal deposits, look for any asteroid field
         print("\nLooking for any asteroid fields...")
-        asteroid_fields = [wp for wp in all_waypoints if wp["type"] == "ASTEROID"]
+        asteroid_fields = client.find_waypoints_of_type(current_system, "ASTEROID")
 
         if asteroid_fields:
             # Find the closest one
-            current_x = next(
-                wp["x"] for wp in all_waypoints if wp["symbol"] == current_waypoint
-            )
-            current_y = next(
-                wp["y"] for wp in all_waypoints if wp["symbol"] == current_waypoint
-            )
+            current = client.find_waypoint(current_system, current_waypoint)
+            current_x, current_y = current["x"], current["y"]
 
-            # Sort by distance
-            asteroid_fields.sort(
-                key=lambda wp: ((wp["x"] - current_x) ** 2 + (wp["y"] - current_y) ** 2)
-                ** 0.5
+            # Only the closest is needed, so skip sorting the whole list
+            target = min(
+                asteroid_fields,
+                key=lambda wp: distance_between(wp, current_x, current_y),
             )
-
-            target = asteroid_fields[0]
             print(f"Found asteroid: {target['symbol']}")
             print("Asteroid traits:")
             for trait in target.get("traits", []):
                 print(f"- {trait['name']}: {trait['description']}")
             print(
-                f"Distance: {int(((target['x'] - current_x) ** 2 + (target['y'] - current_y) ** 2) ** 0.5)} units"
+                f"Distance: {int(distance_between(target, current_x, current_y))} units"
             )
             return target
 
@@ -153,8 +208,6 @@ def find_nearest_asteroid_field(
 
 def calculate_transit_time(nav_data: Dict[str, Any]) -> str:
     """Calculate and format transit time from navigation data"""
-    from datetime import datetime
-
     departure = datetime.fromisoformat(
         nav_data["route"]["departureTime"].replace("Z", "+00:00")
     )
@@ -169,8 +222,6 @@ def calculate_transit_time(nav_data: Dict[str, Any]) -> str:
 
 def calculate_remaining_time(arrival_time: str) -> str:
     """Calculate and format remaining time until arrival"""
-    from datetime import datetime
-
     arrival = datetime.fromisoformat(arrival_time.replace("Z", "+00:00"))
     now = datetime.now(arrival.tzinfo)
     remaining = arrival - now
@@ -186,23 +237,24 @@ def calculate_remaining_time(arrival_time: str) -> str:
 def wait_for_arrival(
     client: SpaceTradersClient, ship_symbol: str, nav_data: Dict[str, Any]
 ) -> None:
-    """Wait for ship to arrive at destination with time updates every 30 seconds"""
-    arrival_time = nav_data["route"]["arrival"]
-    update_interval = 30  # seconds between updates
-    last_update = time.time()  # Initialize with current time
+    """Sleep until the reported arrival time, then poll briefly until the ship lands"""
+    poll_interval = ARRIVAL_POLL_START
 
     while nav_data["status"] == "IN_TRANSIT":
-        current_time = time.time()
-
-        # Only update if enough time has passed since last update
-        if current_time - last_update >= update_interval:
-            remaining = calculate_remaining_time(arrival_time)
-            print(f"In transit... {remaining}")
-            last_update = current_time
-
-        time.sleep(5)  # Still check status every 5 seconds
-        nav = client.get_ship_nav(ship_symbol)
-        nav_data = nav["data"]
+        arrival_time = nav_data["route"]["arrival"]
+        remaining = seconds_until(arrival_time)
+        if remaining > 0:
+            print(f"In transit... {calculate_remaining_time(arrival_time)}")
+            # Wake up periodically so long flights still report progress
+            time.sleep(min(remaining, ARRIVAL_UPDATE_INTERVAL))
+            continue
+
+        # Past the ETA: confirm with the API, backing off if it lags behind.
+        # Jitter keeps ships that arrive together from polling in lockstep.
+        nav_data = client.get_ship_nav(ship_symbol)["data"]
+        if nav_data["status"] == "IN_TRANSIT":
+            time.sleep(poll_interval + random.uniform(0, ARRIVAL_POLL_JITTER))
+            poll_interval = min(poll_interval * 2, ARRIVAL_POLL_CAP)
 
 
 def check_and_refuel(client: SpaceTradersClient, ship_symbol: str) -> None:
@@ -251,27 +303,21 @@ def check_and_refuel(client: SpaceTradersClient, ship_symbol: str) -> None:
         if not stations:
             raise Exception("No fuel stations found in system!")
 
-        # Calculate closest station
-        def distance(waypoint):
-            dx = waypoint["x"] - current_x
-            dy = waypoint["y"] - current_y
-            return (dx * dx + dy * dy) ** 0.5
-
-        nearest = min(stations, key=distance)
+        # Find the closest station
+        nearest = min(
+            stations, key=lambda wp: distance_between(wp, current_x, current_y)
+        )
         print(
             f"Found fuel station at {nearest['symbol']} ({nearest['x']}, {nearest['y']})"
         )
-        print(f"Distance: {int(distance(nearest))} units")
+        print(f"Distance: {int(distance_between(nearest, current_x, current_y))} units")
 
         # Navigate to station if needed
         if current_waypoint != nearest["symbol"]:
             if status != "IN_ORBIT":
                 print("Entering orbit...")
-                client.orbit_ship(ship_symbol)
-                time.sleep(2)  # Wait a moment for orbit
-                # Get updated status
-                nav = client.get_ship_nav(ship_symbol)
-                status = nav["data"]["status"]
+                # The orbit response already reports the updated status
+                status = client.orbit_ship(ship_symbol)["data"]["nav"]["status"]
 
             print(f"\nPreparing navigation:")
             print(f"- Ship status: {status}")
@@ -286,19 +332,8 @@ def check_and_refuel(client: SpaceTradersClient, ship_symbol: str) -> None:
 
                 # Wait for arrival with progress updates
                 print("\nWaiting for arrival...")
-                while True:
-                    nav_status = client.get_ship_nav(ship_symbol)
-                    current_status = nav_status["data"]["status"]
-                    current_loc = nav_status["data"]["waypointSymbol"]
-                    print(f"Status: {current_status} at {current_loc}")
-
-                    if (
-                        current_status == "IN_ORBIT"
-                        and current_loc == nearest["symbol"]
-                    ):
-                        break
-                    time.sleep(2)
-
+                wait_for_arrival(client, ship_symbol, nav_data)
+                status = "IN_ORBIT"
                 print("Arrived at fuel station")
 
             except Exception as e:
@@ -313,7 +348,6 @@ def check_and_refuel(client: SpaceTradersClient, ship_symbol: str) -> None:
         if status != "DOCKED":
             print("Docking at fuel station...")
             client.dock_ship(ship_symbol)
-            time.sleep(1)
 
         print("Refueling...")
         result = client.refuel_ship(ship_symbol)
@@ -343,14 +377,7 @@ def find_command_ship(client: SpaceTradersClient) -> Optional[Dict[str, Any]]:
 
         # If no dedicated command ship, look for any non-mining ship
         command_ship = next(
-            (
-                ship
-                for ship in ships["data"]
-                if not any(
-                    mount["symbol"].startswith("MOUNT_MINING_LASER")
-                    for mount in ship["mounts"]
-                )
-            ),
+            (ship for ship in ships["data"] if not has_mining_laser(ship)),
             None,
         )
         if command_ship:
@@ -373,10 +400,7 @@ def find_mining_drone(client: SpaceTradersClient) -> Optional[Dict[str, Any]]:
                 ship
                 for ship in ships["data"]
                 if ship["registration"]["role"] == "EXCAVATOR"
-                and any(
-                    mount["symbol"].startswith("MOUNT_MINING_LASER")
-                    for mount in ship["mounts"]
-                )
+                and has_mining_laser(ship)
             ),
             None,
         )
@@ -386,14 +410,7 @@ def find_mining_drone(client: SpaceTradersClient) -> Optional[Dict[str, Any]]:
 
         # If no dedicated mining drone, look for any ship with mining lasers
         mining_drone = next(
-            (
-                ship
-                for ship in ships["data"]
-                if any(
-                    mount["symbol"].startswith("MOUNT_MINING_LASER")
-                    for mount in ship["mounts"]
-                )
-            ),
+            (ship for ship in ships["data"] if has_mining_laser(ship)),
             None,
         )
         if mining_drone:
@@ -420,10 +437,7 @@ def prepare_for_mining(
         ship_info = client.get_my_ship(ship_symbol)
         is_command_ship = ship_info["data"]["registration"][
             "role"
-        ] == "COMMAND" and not any(
-            mount["symbol"].startswith("MOUNT_MINING_LASER")
-            for mount in ship_info["data"]["mounts"]
-        )
+        ] == "COMMAND" and not has_mining_laser(ship_info["data"])
 
         # If this is a command ship, find and use the mining drone
         if is_command_ship:
@@ -433,24 +447,26 @@ def prepare_for_mining(
                 print("No mining drone found.")
                 return False, None
             ship_symbol = mining_drone["symbol"]
+            # The fleet listing already holds the drone's full details
+            ship_info = {"data": mining_drone}
             print(f"Using mining drone: {ship_symbol}")
 
-        # Get ship's current location
-        nav = client.get_ship_nav(ship_symbol)
-        current_system = nav["data"]["systemSymbol"]
-        current_status = nav["data"]["status"]
-        current_waypoint = nav["data"]["waypointSymbol"]
+        # Get ship's current location from the details fetched above
+        nav = ship_info["data"]["nav"]
+        current_system = nav["systemSymbol"]
+        current_status = nav["status"]
+        current_waypoint = nav["waypointSymbol"]
         print(f"Ship is in system {current_system}")
         print(f"Current location: {current_waypoint}")
         print(f"Current status: {current_status}")
 
-        # Get ship details for fuel
-        ship_info = client.get_my_ship(ship_symbol)
         fuel = ship_info["data"]["fuel"]
         print(f"\nFuel status: {fuel['current']}/{fuel['capacity']} units")
 
         # Find nearest asteroid field
-        asteroid_field = find_nearest_asteroid_field(client, ship_symbol, resource_type)
+        asteroid_field = find_nearest_asteroid_field(
+            client, ship_symbol, resource_type, nav
+        )
         if not asteroid_field:
             print("No suitable asteroid fields found.")
             return False, None
@@ -461,9 +477,8 @@ def prepare_for_mining(
         # Always ensure we're in orbit before attempting navigation
         if current_status == "DOCKED":
             print("Entering orbit before navigation...")
-            client.orbit_ship(ship_symbol)
-            nav = client.get_ship_nav(ship_symbol)
-            current_status = nav["data"]["status"]
+            nav = client.orbit_ship(ship_symbol)["data"]["nav"]
+            current_status = nav["status"]
             print(f"New status: {current_status}")
 
         # If we're already at the target, just ensure proper orbit
@@ -581,6 +596,7 @@ def mine_resources(
             try:
                 print("\nExtracting resources...")
                 result = client.extract_resources(ship_symbol)
+                record_cooldown(ship_symbol, result["data"]["cooldown"])
                 extraction = result["data"]["extraction"]
                 cargo_item = extraction["yield"]
 
@@ -593,8 +609,8 @@ def mine_resources(
                     results.append(result)
 
             except ApiError as e:
-                if "cooldown" in str(e).lower():
-                    wait_for_cooldown(client, ship_symbol)
+                if is_cooldown_conflict(e):
+                    wait_for_cooldown(client, ship_symbol, refresh=True)
                 else:
                     print(f"Extraction failed: {str(e)}")
                     raise
@@ -648,14 +664,14 @@ def sell_all_cargo(
 
 def get_market_imports(
     client: SpaceTradersClient, system: str, waypoint: str
-) -> List[str]:
-    """Get list of goods that can be sold at this market"""
+) -> Set[str]:
+    """Get the set of goods that can be sold at this market"""
     try:
         market_data = client.get_market(system, waypoint)
-        return [item["symbol"] for item in market_data["data"]["imports"]]
+        return {item["symbol"] for item in market_data["data"]["imports"]}
     except ApiError as e:
         print(f"Failed to get market data: {str(e)}")
-        return []
+        return set()
 
 
 def find_market_for_goods(
@@ -680,51 +696,39 @@ def find_market_for_goods(
     """
     try:
         # Get all waypoints in system
-        all_waypoints = []
-        page = 1
-        while True:
-            response = client._make_request(
-                "GET", f"systems/{system}/waypoints?page={page}"
-            )
-            all_waypoints.extend(response["data"])
-            if page * 10 >= response["meta"]["total"]:
-                break
-            page += 1
-
-        # Find markets
-        markets = [
-            wp
-            for wp in all_waypoints
-            if any(trait["symbol"] == "MARKETPLACE" for trait in wp.get("traits", []))
-        ]
+        markets = client.find_waypoints_with_trait(system, "MARKETPLACE")
 
         if not markets:
             print("No markets found in system")
             return None
 
-        # Check each market's imports
-        suitable_markets = []
-        for market in markets:
-            imports = get_market_imports(client, system, market["symbol"])
-            # Check if market accepts any of our goods
-            if any(good in imports for good in goods):
-                suitable_markets.append(market)
+        # Fetch every market at once, keeping the imports for the summary below
+        markets_data = client.get_system_markets(system)
+        imports_by_market = {
+            symbol: {item["symbol"] for item in market_data.get("imports", [])}
+            for symbol, market_data in markets_data.items()
+        }
+
+        # Keep markets that accept any of our goods
+        wanted = set(goods)
+        suitable_markets = [
+            market
+            for market in markets
+            if not wanted.isdisjoint(imports_by_market.get(market["symbol"], ()))
+        ]
 
         if not suitable_markets:
             print("No markets found that accept our goods")
             return None
 
         # Find closest suitable market
-        def distance(waypoint):
-            dx = waypoint["x"] - current_x
-            dy = waypoint["y"] - current_y
-            return (dx * dx + dy * dy) ** 0.5
-
-        nearest = min(suitable_markets, key=distance)
+        nearest = min(
+            suitable_markets, key=lambda wp: distance_between(wp, current_x, current_y)
+        )
         print(f"\nFound suitable market at {nearest['symbol']}")
-        print(f"Distance: {int(distance(nearest))} units")
+        print(f"Distance: {int(distance_between(nearest, current_x, current_y))} units")
         print("Accepted goods:")
-        market_imports = get_market_imports(client, system, nearest["symbol"])
+        market_imports = imports_by_market[nearest["symbol"]]
         for good in goods:
             if good in market_imports:
                 print(f"- {good}")
@@ -747,7 +751,7 @@ def sell_cargo_at_market(
     results = []
     try:
         # Get market imports
-        system = "-".join(market_waypoint.split("-")[:2])
+        system = system_symbol_of(market_waypoint)
         market_imports = get_market_imports(client, system, market_waypoint)
 
         # Get cargo
@@ -1,20 +1,214 @@
+import json
+import math
 import os
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import requests
-from dotenv import load_dotenv, set_key
+from dotenv import load_dotenv
 from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; the stdlib json module is used otherwise
+    orjson = None
+
+
+def dumps_json(value: Any) -> str:
+    """Serialize a value to a JSON string, using orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value)
+
+
+def loads_json(text: Union[str, bytes]) -> Any:
+    """Parse a JSON string or raw body, using orjson when installed"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
 
 
 class ApiError(Exception):
     """Custom exception for API errors"""
 
-    pass
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        error_code: Optional[int] = None,
+    ):
+        super().__init__(message)
+        self.status_code = status_code  # HTTP status, if a response was received
+        self.retry_after = retry_after  # Seconds the API asked us to back off
+        self.error_code = error_code  # SpaceTraders error code from the body
+
+
+def parse_retry_after(response: Optional[requests.Response]) -> Optional[float]:
+    """Read the back-off the API requested from a rate-limited response"""
+    if response is None:
+        return None
+    header = response.headers.get("Retry-After")
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    try:
+        error = response.json().get("error") or {}
+        return float((error.get("data") or {})["retryAfter"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def parse_error_code(response: Optional[requests.Response]) -> Optional[int]:
+    """Read the SpaceTraders error code from a failed response's body"""
+    if response is None:
+        return None
+    try:
+        error = response.json().get("error") or {}
+        return int(error["code"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+def backoff_delay(retry_after: Optional[float], attempt: int, cap: float) -> float:
+    """Back-off before retrying a rate-limited request, with capped jitter"""
+    # Honour the server's hint; otherwise back off exponentially. The jitter
+    # keeps concurrent workers from retrying in lockstep.
+    base = retry_after if retry_after is not None else 2**attempt
+    return min(cap, base + random.uniform(0, 1))
+
+
+class TokenBucket:
+    """Thread-safe token bucket that paces requests to the API rate limit"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate  # Tokens added per second
+        self.capacity = capacity  # Maximum burst size
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until it is available"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.last_refill) * self.rate
+            )
+            self.last_refill = now
+            # Reserve the token now so concurrent callers queue behind us
+            self.tokens -= 1
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+class TTLCache:
+    """Thread-safe in-memory cache whose entries expire after a fixed age"""
+
+    def __init__(self, ttl: float, maxsize: int = 256):
+        self.ttl = ttl  # Seconds an entry stays valid
+        self.maxsize = maxsize  # Oldest entries are evicted past this
+        # Kept in write order, which with one TTL is also expiry order
+        self.entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                del self.entries[key]
+                return None
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, restarting its expiry clock"""
+        with self.lock:
+            now = time.monotonic()
+            self.entries[key] = (now, value)
+            self.entries.move_to_end(key)
+
+            # Expired entries sit at the front, so drop them without a scan
+            while self.entries:
+                stored_at, _ = next(iter(self.entries.values()))
+                if now - stored_at < self.ttl and len(self.entries) <= self.maxsize:
+                    break
+                self.entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """Drop an entry if it is cached"""
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+def system_symbol_of(waypoint_symbol: str) -> str:
+    """Get the system a waypoint belongs to, e.g. X1-DF55-20250Z -> X1-DF55"""
+    return waypoint_symbol.rsplit("-", 1)[0]
+
+
+def distance_between(waypoint: Dict[str, Any], x: int, y: int) -> float:
+    """Straight-line distance from a waypoint to the given coordinates"""
+    return math.hypot(waypoint["x"] - x, waypoint["y"] - y)
+
+
+def index_waypoints(waypoints: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Index a system's waypoints by symbol, trait and type in a single pass"""
+    by_symbol: Dict[str, Dict[str, Any]] = {}
+    by_trait: Dict[str, List[Dict[str, Any]]] = {}
+    by_type: Dict[str, List[Dict[str, Any]]] = {}
+    for waypoint in waypoints:
+        by_symbol[waypoint["symbol"]] = waypoint
+        # Types and traits repeat across a system; share one string per symbol
+        waypoint["type"] = sys.intern(waypoint["type"])
+        by_type.setdefault(waypoint["type"], []).append(waypoint)
+        for trait in waypoint.get("traits", []):
+            trait["symbol"] = sys.intern(trait["symbol"])
+            by_trait.setdefault(trait["symbol"], []).append(waypoint)
+    return {
+        "all": waypoints,
+        "symbols": by_symbol,
+        "traits": by_trait,
+        "types": by_type,
+    }
+
+
+def is_static_endpoint(endpoint: str) -> bool:
+    """Check if an endpoint returns data that does not change during a reset"""
+    path = endpoint.split("?")[0]
+    return path.startswith("systems/") and not path.endswith(
+        ("/market", "/shipyard", "/construction")
+    )
 
 
 class SpaceTradersClient:
     BASE_URL = "https://api.spacetraders.io/v2"
+    CACHE_PATH = Path(".cache") / "responses.jsonl"
+    STATIC_CACHE_TTL = 3600  # Seconds to keep system and waypoint data
+    CACHE_LOG_SLACK = 256  # Superseded log lines tolerated before compacting
+    RATE_LIMIT = 2  # Requests per second allowed by the API
+    MARKET_CACHE_TTL = 30  # Seconds before market prices are fetched again
+    MARKET_STALE_TTL = 300  # Seconds an older snapshot is served while refreshing
+    WAYPOINT_CACHE_TTL = STATIC_CACHE_TTL  # Waypoints change as rarely as systems
+    WAYPOINT_PAGE_LIMIT = 20  # Largest page size the API accepts
+    MARKET_CACHE_SIZE = 256  # Markets kept in memory before the oldest is dropped
+    WAYPOINT_CACHE_SIZE = 16  # Systems kept in memory before the oldest is dropped
+    MAX_RATE_LIMIT_RETRIES = 3  # Attempts to resend a request answered with 429
+    RETRY_DELAY_CAP = 10  # Longest back-off in seconds between those attempts
+    POOL_SIZE = 8  # Keep-alive connections held open for concurrent lookups
+    REQUEST_TIMEOUT = 30  # Seconds to wait on the server before giving up a request
 
     def __init__(self, token: Optional[str] = None):
         """Initialize the SpaceTraders client with an optional token"""
@@ -30,6 +224,33 @@ class SpaceTradersClient:
             "Content-Type": "application/json",
         }
 
+        # Share one session so every call reuses pooled keep-alive connections
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # Every call goes to one host, so a single pool sized for the worker
+        # threads is enough; failed requests are not retried here
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.POOL_SIZE, max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.rate_limiter = TokenBucket(self.RATE_LIMIT, self.RATE_LIMIT)
+        # Reads already in flight, so concurrent callers can share the result
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+        # Static GET responses survive restarts so startup skips repeat lookups
+        self._disk_cache_lock = threading.Lock()
+        self._disk_cache = self._load_disk_cache()
+        # Markets are cached as (fetched_at, response) so stale entries can be
+        # served while a background refresh runs
+        self.market_cache = TTLCache(self.MARKET_STALE_TTL, self.MARKET_CACHE_SIZE)
+        self._market_refresher = ThreadPoolExecutor(max_workers=2)
+        self._market_refreshing = set()
+        self._market_refresh_lock = threading.Lock()
+        self.waypoint_cache = TTLCache(
+            self.WAYPOINT_CACHE_TTL, self.WAYPOINT_CACHE_SIZE
+        )
+
     @staticmethod
     def register_new_agent(symbol: str, faction: str = "COSMIC") -> Dict[str, Any]:
         """
@@ -45,44 +266,225 @@ class SpaceTradersClient:
         url = f"{SpaceTradersClient.BASE_URL}/register"
 
         try:
-            response = requests.post(url, json={"symbol": symbol, "faction": faction})
+            response = requests.post(
+                url,
+                json={"symbol": symbol, "faction": faction},
+                timeout=SpaceTradersClient.REQUEST_TIMEOUT,
+            )
             response.raise_for_status()
             data = response.json()
 
-            # Save token to .env file
-            token = data["data"]["token"]
-            env_path = Path(".env")
+            token = (data.get("data") or {}).get("token")
+            if not token:
+                raise ApiError("Registration failed: response did not include a token")
 
-            # Create .env file if it doesn't exist
-            env_path.touch(exist_ok=True)
-
-            # Save token to .env
-            set_key(str(env_path), "SPACETRADERS_TOKEN", token)
+            # Save token to .env file
+            SpaceTradersClient.save_token(token)
 
             return data
 
         except requests.exceptions.RequestException as e:
             raise ApiError(f"Registration failed: {str(e)}")
 
+    @staticmethod
+    def save_token(token: str, env_path: Path = Path(".env")) -> None:
+        """Write the token to the .env file atomically, keeping other settings"""
+        lines = []
+        if env_path.exists():
+            lines = [
+                line
+                for line in env_path.read_text().splitlines()
+                if not line.startswith("SPACETRADERS_TOKEN=")
+            ]
+
+        # Write a sibling temp file and swap it in so a crash never truncates .env
+        tmp_path = env_path.with_name(env_path.name + ".tmp")
+        lines.append(f"SPACETRADERS_TOKEN={token}")
+        tmp_path.write_text("\n".join(lines) + "\n")
+        tmp_path.replace(env_path)
+
+    def _load_disk_cache(self) -> Dict[str, Dict[str, Any]]:
+        """Replay the cache log from disk, keeping the newest unexpired entries"""
+        cache: Dict[str, Dict[str, Any]] = {}
+        line_count = 0
+        try:
+            with open(self.CACHE_PATH) as f:
+                for line in f:
+                    line_count += 1
+                    try:
+                        record = loads_json(line)
+                        cache[record["endpoint"]] = {
+                            "time": record["time"],
+                            "response": record["response"],
+                        }
+                    except (KeyError, ValueError):
+                        continue  # Skip a line torn by an interrupted write
+        except OSError:
+            self._disk_cache_lines = 0
+            return {}
+
+        now = time.time()
+        cache = {
+            endpoint: entry
+            for endpoint, entry in cache.items()
+            if now - entry["time"] < self.STATIC_CACHE_TTL
+        }
+
+        self._disk_cache_lines = line_count
+        # Rewrite the log once it holds superseded, expired or broken lines
+        if line_count > len(cache):
+            self._compact_disk_cache(cache)
+        return cache
+
+    def _compact_disk_cache(self, cache: Dict[str, Dict[str, Any]]) -> None:
+        """Rewrite the cache log with one line per live entry"""
+        lines = [
+            dumps_json({"endpoint": endpoint, **entry})
+            for endpoint, entry in cache.items()
+        ]
+        tmp_path = self.CACHE_PATH.with_name(self.CACHE_PATH.name + ".tmp")
+        try:
+            tmp_path.write_text("".join(f"{line}\n" for line in lines))
+            tmp_path.replace(self.CACHE_PATH)
+            self._disk_cache_lines = len(lines)
+        except OSError as e:
+            print(f"Failed to compact response cache: {str(e)}")
+
+    def _append_disk_cache(self, endpoint: str, entry: Dict[str, Any]) -> None:
+        """Cache one response in memory and append it to the log on disk"""
+        line = dumps_json({"endpoint": endpoint, **entry})
+        with self._disk_cache_lock:
+            self._disk_cache[endpoint] = entry
+            try:
+                self.CACHE_PATH.parent.mkdir(exist_ok=True)
+                with open(self.CACHE_PATH, "a") as f:
+                    f.write(f"{line}\n")
+                self._disk_cache_lines += 1
+
+                # Long runs re-cache expired lookups, so drop the expired
+                # entries and snapshot the rest once enough superseded lines
+                # have built up
+                stale_lines = self._disk_cache_lines - len(self._disk_cache)
+                if stale_lines > self.CACHE_LOG_SLACK:
+                    now = time.time()
+                    self._disk_cache = {
+                        key: cached
+                        for key, cached in self._disk_cache.items()
+                        if now - cached["time"] < self.STATIC_CACHE_TTL
+                    }
+                    self._compact_disk_cache(self._disk_cache)
+            except OSError as e:
+                print(f"Failed to write response cache: {str(e)}")
+
     def _make_request(
         self, method: str, endpoint: str, data: Optional[Dict] = None
     ) -> Dict[str, Any]:
         """Make a request to the SpaceTraders API"""
+        cacheable = method == "GET" and is_static_endpoint(endpoint)
+        if cacheable:
+            entry = self._disk_cache.get(endpoint)
+            if entry and time.time() - entry["time"] < self.STATIC_CACHE_TTL:
+                return entry["response"]
+
+        def fetch() -> Dict[str, Any]:
+            response = self._send_request(method, endpoint, data)
+            if cacheable:
+                entry = {"time": time.time(), "response": response}
+                self._append_disk_cache(endpoint, entry)
+            return response
+
+        if method == "GET":
+            # Concurrent reads of the same resource share one request
+            return self._single_flight(endpoint, fetch)
+        return fetch()
+
+    def _single_flight(self, key: str, fetch: Callable[[], Any]) -> Any:
+        """Run fetch once for all concurrent callers using the same key"""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not is_owner:
+            try:
+                return future.result()
+            except CancelledError:
+                # The owner was interrupted, so fetch for this caller instead
+                return self._single_flight(key, fetch)
+
+        try:
+            result = fetch()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            # Interrupts such as KeyboardInterrupt stay in the owning thread
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+
+    def _send_request(
+        self, method: str, endpoint: str, data: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Send a request to the SpaceTraders API, retrying when rate limited"""
         url = f"{self.BASE_URL}/{endpoint}"
+        # The session already sends a JSON Content-Type header
+        body = dumps_json(data).encode() if data is not None else None
 
         try:
-            response = requests.request(
-                method=method, url=url, headers=self.headers, json=data
-            )
+            for attempt in range(self.MAX_RATE_LIMIT_RETRIES + 1):
+                self.rate_limiter.acquire()
+                response = self.session.request(
+                    method=method, url=url, data=body, timeout=self.REQUEST_TIMEOUT
+                )
+                if (
+                    response.status_code != 429
+                    or attempt == self.MAX_RATE_LIMIT_RETRIES
+                ):
+                    break
+                delay = backoff_delay(
+                    parse_retry_after(response), attempt, self.RETRY_DELAY_CAP
+                )
+                print(f"Rate limited, retrying in {delay:.1f} seconds...")
+                time.sleep(delay)
+
             if response.status_code == 422:
-                error_data = response.json()
+                error = response.json().get("error") or {}
+                message = error.get("message", "No details provided")
                 raise ApiError(
-                    f"API request failed: {response.status_code} {response.reason} - {error_data.get('error', {}).get('message', 'No details provided')}"
+                    f"API request failed: {response.status_code} {response.reason} - {message}",
+                    status_code=response.status_code,
+                    error_code=parse_error_code(response),
                 )
             response.raise_for_status()
-            return response.json()
+            try:
+                # Parse the raw bytes directly, skipping the text decode step
+                return loads_json(response.content)
+            except ValueError as e:
+                raise ApiError(
+                    f"API returned invalid JSON: {str(e)}",
+                    status_code=response.status_code,
+                )
         except requests.exceptions.RequestException as e:
-            raise ApiError(f"API request failed: {str(e)}")
+            response = getattr(e, "response", None)
+            raise ApiError(
+                f"API request failed: {str(e)}",
+                status_code=response.status_code if response is not None else None,
+                retry_after=parse_retry_after(response),
+                error_code=parse_error_code(response),
+            )
+
+    def close(self) -> None:
+        """Close the underlying HTTP session"""
+        self._market_refresher.shutdown(wait=False)
+        self.session.close()
 
     def get_agent(self) -> Dict[str, Any]:
         """Get current agent details"""
@@ -100,11 +502,124 @@ class SpaceTradersClient:
         """Get waypoints in a system"""
         return self._make_request("GET", f"systems/{system_symbol}/waypoints")
 
-    def get_market(self, system_symbol: str, waypoint_symbol: str) -> Dict[str, Any]:
-        """Get market data for a waypoint"""
-        return self._make_request(
+    def _get_waypoint_index(self, system_symbol: str) -> Dict[str, Any]:
+        """Get a system's waypoints grouped by trait and type, fetching if needed"""
+        index = self.waypoint_cache.get(system_symbol)
+        if index is not None:
+            return index
+        return self._single_flight(
+            f"waypoint-index/{system_symbol}",
+            lambda: self._build_waypoint_index(system_symbol),
+        )
+
+    def _build_waypoint_index(self, system_symbol: str) -> Dict[str, Any]:
+        """Fetch every page of a system's waypoints and cache the index"""
+
+        def get_page(page: int) -> Dict[str, Any]:
+            return self._make_request(
+                "GET",
+                f"systems/{system_symbol}/waypoints"
+                f"?page={page}&limit={self.WAYPOINT_PAGE_LIMIT}",
+            )
+
+        # The first page reports the total, so the rest can be fetched together
+        first_page = get_page(1)
+        waypoints = list(first_page["data"])
+        page_count = math.ceil(first_page["meta"]["total"] / self.WAYPOINT_PAGE_LIMIT)
+        if page_count > 1:
+            with ThreadPoolExecutor(max_workers=self.POOL_SIZE) as executor:
+                for response in executor.map(get_page, range(2, page_count + 1)):
+                    waypoints.extend(response["data"])
+
+        index = index_waypoints(waypoints)
+        self.waypoint_cache.set(system_symbol, index)
+        return index
+
+    def list_all_waypoints(self, system_symbol: str) -> List[Dict[str, Any]]:
+        """Get every waypoint in a system, following pagination"""
+        return self._get_waypoint_index(system_symbol)["all"]
+
+    def find_waypoints_with_trait(
+        self, system_symbol: str, trait: str
+    ) -> List[Dict[str, Any]]:
+        """Get the waypoints in a system that have a trait (shared, do not modify)"""
+        return self._get_waypoint_index(system_symbol)["traits"].get(trait, [])
+
+    def find_waypoints_of_type(
+        self, system_symbol: str, waypoint_type: str
+    ) -> List[Dict[str, Any]]:
+        """Get the waypoints in a system of a type (shared, do not modify)"""
+        return self._get_waypoint_index(system_symbol)["types"].get(waypoint_type, [])
+
+    def find_waypoint(
+        self, system_symbol: str, waypoint_symbol: str
+    ) -> Optional[Dict[str, Any]]:
+        """Look a waypoint up in its system's listing (shared, do not modify)"""
+        return self._get_waypoint_index(system_symbol)["symbols"].get(waypoint_symbol)
+
+    def get_market(
+        self, system_symbol: str, waypoint_symbol: str, fresh: bool = False
+    ) -> Dict[str, Any]:
+        """Get market data for a waypoint, reusing a recent snapshot if available"""
+        # Trade goods are only listed while a ship is present, so a ship at the
+        # market passes fresh=True rather than reuse a snapshot taken from afar
+        cached = None if fresh else self.market_cache.get(waypoint_symbol)
+        if cached is None:
+            return self._fetch_market(system_symbol, waypoint_symbol)
+
+        fetched_at, market = cached
+        if time.monotonic() - fetched_at >= self.MARKET_CACHE_TTL:
+            self._refresh_market(system_symbol, waypoint_symbol)
+        return market
+
+    def _fetch_market(self, system_symbol: str, waypoint_symbol: str) -> Dict[str, Any]:
+        """Fetch market data from the API and cache it"""
+        market = self._make_request(
             "GET", f"systems/{system_symbol}/waypoints/{waypoint_symbol}/market"
         )
+        self.market_cache.set(waypoint_symbol, (time.monotonic(), market))
+        return market
+
+    def _refresh_market(self, system_symbol: str, waypoint_symbol: str) -> None:
+        """Refetch a stale market in the background, once per waypoint at a time"""
+        with self._market_refresh_lock:
+            if waypoint_symbol in self._market_refreshing:
+                return
+            self._market_refreshing.add(waypoint_symbol)
+
+        def refresh() -> None:
+            try:
+                self._fetch_market(system_symbol, waypoint_symbol)
+            except ApiError as e:
+                print(f"Background market refresh failed: {str(e)}")
+            finally:
+                with self._market_refresh_lock:
+                    self._market_refreshing.discard(waypoint_symbol)
+
+        self._market_refresher.submit(refresh)
+
+    def get_system_markets(self, system_symbol: str) -> Dict[str, Dict[str, Any]]:
+        """Get market data for every marketplace in a system, keyed by waypoint"""
+        market_symbols = [
+            waypoint["symbol"]
+            for waypoint in self.find_waypoints_with_trait(system_symbol, "MARKETPLACE")
+        ]
+
+        def fetch(waypoint_symbol: str) -> Optional[Dict[str, Any]]:
+            try:
+                return self.get_market(system_symbol, waypoint_symbol)["data"]
+            except ApiError:
+                return None
+
+        # One blocking call for the caller, with the lookups fanned out
+        with ThreadPoolExecutor(max_workers=self.POOL_SIZE) as executor:
+            markets = executor.map(fetch, market_symbols)
+
+        return {
+            symbol: market
+            for symbol, market in zip(market_symbols, markets)
+            if market is not None
+        }
 
     def navigate_ship(self, ship_symbol: str, waypoint_symbol: str) -> Dict[str, Any]:
         """Navigate ship to waypoint"""
@@ -129,7 +644,10 @@ class SpaceTradersClient:
         )
 
     def get_waypoint(self, system_symbol: str, waypoint_symbol: str) -> Dict[str, Any]:
-        """Get waypoint details"""
+        """Get waypoint details, from the system's listing if it is already cached"""
+        index = self.waypoint_cache.get(system_symbol)
+        if index is not None and waypoint_symbol in index["symbols"]:
+            return {"data": index["symbols"][waypoint_symbol]}
         return self._make_request(
             "GET", f"systems/{system_symbol}/waypoints/{waypoint_symbol}"
         )
@@ -165,9 +683,9 @@ class SpaceTradersClient:
     def check_waypoint_sells_fuel(
         self, system_symbol: str, waypoint_symbol: str
     ) -> bool:
-        """Check if a waypoint sells fuel"""
+        """Check if the waypoint a ship is at sells fuel"""
         try:
-            market = self.get_market(system_symbol, waypoint_symbol)
+            market = self.get_market(system_symbol, waypoint_symbol, fresh=True)
             return any(
                 good["symbol"] == "FUEL"
                 for good in market["data"].get("tradeGoods", [])
@@ -178,27 +696,7 @@ class SpaceTradersClient:
     def find_shipyards_in_system(self, system_symbol: str) -> List[Dict[str, Any]]:
         """Find all shipyards in the system"""
         try:
-            # Get all waypoints with pagination
-            all_waypoints = []
-            page = 1
-            while True:
-                response = self._make_request(
-                    "GET", f"systems/{system_symbol}/waypoints?page={page}"
-                )
-                all_waypoints.extend(response["data"])
-                if page * 20 >= response["meta"]["total"]:
-                    break
-                page += 1
-
-            # Look for waypoints with shipyard trait
-            shipyards = [
-                waypoint
-                for waypoint in all_waypoints
-                if any(
-                    trait["symbol"] == "SHIPYARD"
-                    for trait in waypoint.get("traits", [])
-                )
-            ]
+            shipyards = self.find_waypoints_with_trait(system_symbol, "SHIPYARD")
 
             if shipyards:
                 print(f"Found {len(shipyards)} shipyards:")
@@ -223,32 +721,13 @@ class SpaceTradersClient:
         if not shipyards:
             return None
 
-        # Calculate distances and find the closest
-        def distance(waypoint):
-            dx = waypoint["x"] - current_x
-            dy = waypoint["y"] - current_y
-            return (dx * dx + dy * dy) ** 0.5
-
-        return min(shipyards, key=distance)
+        # Find the closest one
+        return min(shipyards, key=lambda wp: distance_between(wp, current_x, current_y))
 
     def find_fuel_stations_in_system(self, system_symbol: str) -> List[Dict[str, Any]]:
         """Find all fuel stations in the system"""
         try:
-            waypoints = []
-            page = 1
-            while True:
-                response = self._make_request(
-                    "GET", f"systems/{system_symbol}/waypoints?page={page}"
-                )
-                waypoints.extend(response["data"])
-                if page * 10 >= response["meta"]["total"]:
-                    break
-                page += 1
-
-            # Look for FUEL_STATION type waypoints
-            fuel_stations = [
-                waypoint for waypoint in waypoints if waypoint["type"] == "FUEL_STATION"
-            ]
+            fuel_stations = self.find_waypoints_of_type(system_symbol, "FUEL_STATION")
 
             if fuel_stations:
                 print(f"Found {len(fuel_stations)} fuel stations:")
@@ -271,13 +750,8 @@ class SpaceTradersClient:
         if not stations:
             return None
 
-        # Calculate distances and find the closest
-        def distance(waypoint):
-            dx = waypoint["x"] - current_x
-            dy = waypoint["y"] - current_y
-            return (dx * dx + dy * dy) ** 0.5
-
-        return min(stations, key=distance)
+        # Find the closest one
+        return min(stations, key=lambda wp: distance_between(wp, current_x, current_y))
 
     def refuel_ship(self, ship_symbol: str) -> Dict[str, Any]:
         """Refuel ship at current waypoint"""
@@ -296,7 +770,9 @@ class SpaceTradersClient:
         if self.check_waypoint_sells_fuel(system, current_waypoint):
             if status != "DOCKED":
                 self.dock_ship(ship_symbol)
-            return self._make_request("POST", f"my/ships/{ship_symbol}/refuel", {})
+            result = self._make_request("POST", f"my/ships/{ship_symbol}/refuel", {})
+            self._invalidate_market(result)
+            return result
 
         # Find nearest fuel station
         print("\nLooking for nearest fuel station...")
@@ -320,7 +796,9 @@ class SpaceTradersClient:
             self.dock_ship(ship_symbol)
 
         # Attempt to refuel
-        return self._make_request("POST", f"my/ships/{ship_symbol}/refuel", {})
+        result = self._make_request("POST", f"my/ships/{ship_symbol}/refuel", {})
+        self._invalidate_market(result)
+        return result
 
     def jettison_cargo(
         self, ship_symbol: str, cargo_symbol: str, units: int
@@ -336,11 +814,19 @@ class SpaceTradersClient:
         self, ship_symbol: str, cargo_symbol: str, units: int
     ) -> Dict[str, Any]:
         """Sell cargo at current market"""
-        return self._make_request(
+        result = self._make_request(
             "POST",
             f"my/ships/{ship_symbol}/sell",
             {"symbol": cargo_symbol, "units": units},
         )
+        self._invalidate_market(result)
+        return result
+
+    def _invalidate_market(self, result: Dict[str, Any]) -> None:
+        """Drop the cached snapshot of a market whose prices a trade just moved"""
+        transaction = result["data"].get("transaction") or {}
+        if transaction.get("waypointSymbol"):
+            self.market_cache.delete(transaction["waypointSymbol"])
 
     def get_ship_nav(self, ship_symbol: str) -> Dict[str, Any]:
         """Get ship's navigation details"""
@@ -354,12 +840,12 @@ class SpaceTradersClient:
         """Find all asteroid fields in the system"""
         try:
             print(f"Searching for asteroid fields in system {system_symbol}...")
-            waypoints = self.get_system_waypoints(system_symbol)
+            waypoints = self.list_all_waypoints(system_symbol)
 
             # Look for both ASTEROID_FIELD type and ASTEROID trait
             asteroid_fields = [
                 waypoint
-                for waypoint in waypoints["data"]
+                for waypoint in waypoints
                 if (
                     waypoint["type"] == "ASTEROID_FIELD"
                     or any(
@@ -408,14 +894,9 @@ class SpaceTradersClient:
         """Find engineered asteroids in the system"""
         try:
             print(f"Searching for engineered asteroids in system {system_symbol}...")
-            waypoints = self.get_system_waypoints(system_symbol)
-
-            # Look specifically for ENGINEERED_ASTEROID type
-            engineered_asteroids = [
-                waypoint
-                for waypoint in waypoints["data"]
-                if waypoint["type"] == "ENGINEERED_ASTEROID"
-            ]
+            engineered_asteroids = self.find_waypoints_of_type(
+                system_symbol, "ENGINEERED_ASTEROID"
+            )
 
             if engineered_asteroids:
                 print(f"Found {len(engineered_asteroids)} engineered asteroids:")
@@ -1,5 +1,9 @@
 import os
-from typing import Optional
+import secrets
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 
@@ -7,78 +11,104 @@ from automation.contract_mining import (ContractMiningError,
                                         handle_contract_mining)
 from automation.coordinated_mining import (CoordinatedMiningError,
                                            coordinate_mining)
-from automation.mining import MiningError
-from client import ApiError, SpaceTradersClient
+from automation.mining import MiningError, has_mining_laser
+from client import ApiError, SpaceTradersClient, system_symbol_of
 
+# Set on SIGTERM so the menu loop exits once the current operation stops
+shutdown_requested = threading.Event()
 
-def initialize_client() -> Optional[SpaceTradersClient]:
-    """Initialize the SpaceTraders client"""
+
+def handle_sigterm(signum, frame) -> None:
+    """Stop the running operation the same way Ctrl+C does"""
+    shutdown_requested.set()
+    raise KeyboardInterrupt
+
+
+def generate_agent_symbol() -> str:
+    """Generate a random agent symbol within the 3-14 character limit"""
+    return f"ZERO-{secrets.token_hex(3).upper()}"
+
+
+def confirm_registration() -> bool:
+    """Ask before registering a new agent on the SpaceTraders server"""
+    answer = input("Register a new agent and save its token to .env? (y/n): ")
+    return answer.strip().lower() == "y"
+
+
+def initialize_client(
+    allow_registration: bool = False,
+) -> Optional[SpaceTradersClient]:
+    """Initialize the SpaceTraders client, offering to register an agent if needed"""
     try:
         load_dotenv()
         token = os.getenv("SPACETRADERS_TOKEN")
         if not token:
             print("No token found in .env file")
-            return None
+            if not allow_registration or not confirm_registration():
+                return None
+            symbol = generate_agent_symbol()
+            print(f"Registering new agent {symbol}...")
+            result = SpaceTradersClient.register_new_agent(symbol)
+            token = result["data"]["token"]
+            print("Registration complete. Token saved to .env")
         return SpaceTradersClient(token)
     except Exception as e:
         print(f"Failed to initialize client: {str(e)}")
         return None
 
 
-def display_agent_info(client: SpaceTradersClient) -> None:
+def fetch_startup_data(
+    client: SpaceTradersClient,
+) -> Tuple[Optional[Dict[str, Any]], Optional[List[Dict[str, Any]]]]:
+    """Fetch agent details and owned ships concurrently"""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        agent_future = executor.submit(client.get_agent)
+        ships_future = executor.submit(client.list_ships)
+
+        agent = None
+        try:
+            agent = agent_future.result()["data"]
+        except ApiError as e:
+            print(f"Failed to get agent info: {str(e)}")
+
+        ships = None
+        try:
+            ships = ships_future.result()["data"]
+        except ApiError as e:
+            print(f"Failed to list ships: {str(e)}")
+
+    return agent, ships
+
+
+def display_agent_info(agent: Dict[str, Any]) -> None:
     """Display agent information"""
-    try:
-        agent_info = client.get_agent()
-        print("\nAgent Information:")
-        print(f"Symbol: {agent_info['data']['symbol']}")
-        print(f"Credits: {agent_info['data']['credits']}")
-        print(f"Headquarters: {agent_info['data']['headquarters']}")
-    except ApiError as e:
-        print(f"Failed to get agent info: {str(e)}")
+    print("\nAgent Information:")
+    print(f"Symbol: {agent['symbol']}")
+    print(f"Credits: {agent['credits']}")
+    print(f"Headquarters: {agent['headquarters']}")
 
 
-def check_shipyard(client: SpaceTradersClient) -> None:
-    """Check shipyard and buy mining ship if needed"""
+def check_shipyard(
+    client: SpaceTradersClient, agent: Dict[str, Any], ships: List[Dict[str, Any]]
+) -> None:
+    """Check shipyard and buy mining ship if needed, adding it to ships"""
     try:
-        agent_info = client.get_agent()
-        headquarters = agent_info["data"]["headquarters"]
-        system = "-".join(headquarters.split("-")[:2])
-
-        # Try common shipyard locations
-        shipyard_locations = ["H54", "H52", "H51"]
-        shipyard = None
-
-        for loc in shipyard_locations:
-            try:
-                waypoint_symbol = f"{system}-{loc}"
-                waypoint = client.get_waypoint(system, waypoint_symbol)
-                if any(
-                    trait["symbol"] == "SHIPYARD"
-                    for trait in waypoint["data"].get("traits", [])
-                ):
-                    shipyard = waypoint_symbol
-                    break
-            except ApiError:
-                continue
-
-        if not shipyard:
-            print("No shipyard found in common locations")
+        headquarters = agent["headquarters"]
+        system = system_symbol_of(headquarters)
+
+        # Look shipyards up in the cached waypoint index instead of probing
+        shipyards = client.find_waypoints_with_trait(system, "SHIPYARD")
+        if not shipyards:
+            print(f"No shipyard found in system {system}")
             return
+        shipyard = shipyards[0]["symbol"]
 
         print(f"\nChecking shipyard at {shipyard}...")
 
-        # List current ships
-        ships = client.list_ships()
         mining_ships = [
             ship
-            for ship in ships["data"]
-            if (
-                ship["registration"]["role"] == "EXCAVATOR"
-                and any(
-                    mount["symbol"].startswith("MOUNT_MINING_LASER")
-                    for mount in ship["mounts"]
-                )
-            )
+            for ship in ships
+            if ship["registration"]["role"] == "EXCAVATOR" and has_mining_laser(ship)
         ]
 
         if mining_ships:
@@ -98,7 +128,7 @@ def check_shipyard(client: SpaceTradersClient) -> None:
             return
 
         drone = mining_drones[0]
-        if agent_info["data"]["credits"] < drone["purchasePrice"]:
+        if agent["credits"] < drone["purchasePrice"]:
             print("Not enough credits to buy a mining drone")
             return
 
@@ -106,23 +136,20 @@ def check_shipyard(client: SpaceTradersClient) -> None:
         purchase_result = client.purchase_ship(drone["type"], shipyard)
         print("Successfully purchased mining drone!")
         print(f"New ship: {purchase_result['data']['ship']['symbol']}")
+        ships.append(purchase_result["data"]["ship"])
 
     except ApiError as e:
         print(f"Failed to check shipyard: {str(e)}")
 
 
-def display_ships(client: SpaceTradersClient) -> None:
+def display_ships(ships: List[Dict[str, Any]]) -> None:
     """Display owned ships"""
-    try:
-        ships = client.list_ships()
-        print("\nOwned Ships:")
-        for ship in ships["data"]:
-            print(f"Ship Symbol: {ship['symbol']}")
-            print(f"Location: {ship['nav']['waypointSymbol']}")
-            print(f"Status: {ship['nav']['status']}")
-            print("---")
-    except ApiError as e:
-        print(f"Failed to list ships: {str(e)}")
+    print("\nOwned Ships:")
+    for ship in ships:
+        print(f"Ship Symbol: {ship['symbol']}")
+        print(f"Location: {ship['nav']['waypointSymbol']}")
+        print(f"Status: {ship['nav']['status']}")
+        print("---")
 
 
 def display_menu() -> str:
@@ -144,9 +171,8 @@ def find_mining_ships(
         mining_drone = None
 
         for ship in ships["data"]:
-            # Get detailed ship info
-            ship_detail = client.get_my_ship(ship["symbol"])["data"]
-            role = ship_detail["registration"]["role"]
+            # The fleet listing already includes each ship's registration
+            role = ship["registration"]["role"]
 
             # Command ships have COMMAND role
             if role == "COMMAND":
@@ -167,23 +193,32 @@ def find_mining_ships(
 
 def main():
     """Main function to run the game loop"""
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+    client = None
     try:
-        # Initialize client
-        client = initialize_client()
+        # Initialize client, registering a new agent only if the user agrees
+        client = initialize_client(allow_registration=True)
         if not client:
             print("Failed to initialize client.")
             return
 
+        # Agent and fleet lookups are independent, so fetch them together
+        agent, ships = fetch_startup_data(client)
+
         # Display agent info
-        display_agent_info(client)
+        if agent:
+            display_agent_info(agent)
 
-        # Check shipyard and buy mining ship if needed
-        check_shipyard(client)
+        if agent and ships is not None:
+            # Check shipyard and buy mining ship if needed
+            check_shipyard(client, agent, ships)
 
         # Display owned ships
-        display_ships(client)
+        if ships is not None:
+            display_ships(ships)
 
-        while True:
+        while not shutdown_requested.is_set():
             choice = display_menu()
 
             if choice == "1":
@@ -216,14 +251,21 @@ def main():
                     print(f"\nCoordinated mining operation failed: {str(e)}")
 
             elif choice == "3":
-                print("\nExiting program...")
                 break
 
             else:
                 print("\nInvalid choice. Please try again.")
 
+        print("\nExiting program...")
+
+    except KeyboardInterrupt:
+        print("\nExiting program...")
     except Exception as e:
         print(f"\nUnexpected error: {str(e)}")
+    finally:
+        # Also reached on Ctrl+C and SIGTERM, which raise KeyboardInterrupt
+        if client is not None:
+            client.close()
 
 
 if __name__ == "__main__":
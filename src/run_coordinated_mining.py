@@ -1,40 +1,40 @@
-import os
-
 from automation.coordinated_mining import (CoordinatedMiningError,
-                                           coordinate_mining_operation)
-from client import SpaceTradersClient
+                                           coordinate_mining)
+from automation.mining import MiningError
+from main import find_mining_ships, initialize_client
 
 
 def main():
     """Run coordinated mining operation"""
+    # Never register here: a new agent has no mining drone to coordinate
+    client = initialize_client()
+    if not client:
+        print(
+            "Failed to initialize client. Set SPACETRADERS_TOKEN in .env to an agent "
+            "that owns a command ship and mining drone."
+        )
+        return
+
     try:
-        # Initialize client
-        token = os.environ.get("SPACETRADERS_TOKEN")
-        if not token:
-            print("Error: SPACETRADERS_TOKEN environment variable not set")
+        command_ship, mining_drone = find_mining_ships(client)
+        if not command_ship or not mining_drone:
+            print(
+                "\nError: Need both a command ship and mining drone for coordinated mining."
+            )
             return
 
-        client = SpaceTradersClient(token)
-
-        # Get agent info for headquarters
-        agent = client.get_agent()
-        headquarters = agent["data"]["headquarters"]
-        system = "-".join(headquarters.split("-")[:2])
-
-        # Find a market to sell at (using headquarters for now)
-        market_waypoint = headquarters
-
-        print("\nStarting coordinated mining operation")
-        print(f"System: {system}")
-        print(f"Market: {market_waypoint}")
+        print("\nStarting coordinated mining with:")
+        print(f"Command Ship: {command_ship}")
+        print(f"Mining Drone: {mining_drone}")
 
-        # Start coordinated mining
-        coordinate_mining_operation(client, market_waypoint)
+        coordinate_mining(client, command_ship, mining_drone)
 
-    except CoordinatedMiningError as e:
+    except (CoordinatedMiningError, MiningError) as e:
         print(f"\nCoordinated mining error: {str(e)}")
     except Exception as e:
         print(f"\nUnexpected error: {str(e)}")
+    finally:
+        client.close()
 
 
 if __name__ == "__main__":
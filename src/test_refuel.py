@@ -1,8 +1,8 @@
 import os
-import time
 from typing import Any, Dict, Optional
 
-from client import SpaceTradersClient
+from automation.mining import wait_for_arrival
+from client import SpaceTradersClient, distance_between
 
 print("Starting test_refuel.py...")  # Debug print
 
@@ -59,13 +59,10 @@ def test_refuel():
             print("No fuel stations found!")
             return
 
-        # Calculate closest station
-        def distance(waypoint):
-            dx = waypoint["x"] - current_x
-            dy = waypoint["y"] - current_y
-            return (dx * dx + dy * dy) ** 0.5
-
-        nearest = min(stations, key=distance)
+        # Find the closest station
+        nearest = min(
+            stations, key=lambda wp: distance_between(wp, current_x, current_y)
+        )
         print(
             f"\nNearest fuel station: {nearest['symbol']} at ({nearest['x']}, {nearest['y']})"
         )
@@ -78,7 +75,6 @@ def test_refuel():
             if status != "IN_ORBIT":
                 print("Entering orbit...")
                 client.orbit_ship(ship_symbol)
-                time.sleep(2)  # Wait a moment for orbit
                 status = "IN_ORBIT"
 
             # Navigate
@@ -89,20 +85,10 @@ def test_refuel():
                 arrival = nav_result["data"]["nav"]["route"]["arrival"]
                 print(f"Navigation started. Arrival at: {arrival}")
 
-                # Wait for arrival
+                # Sleep until the reported arrival instead of polling
                 print("Waiting for arrival...")
-                while True:
-                    nav_status = client.get_ship_nav(ship_symbol)
-                    current_status = nav_status["data"]["status"]
-                    current_waypoint = nav_status["data"]["waypointSymbol"]
-                    print(f"Current status: {current_status} at {current_waypoint}")
-
-                    if (
-                        current_status == "IN_ORBIT"
-                        and current_waypoint == nearest["symbol"]
-                    ):
-                        break
-                    time.sleep(2)
+                wait_for_arrival(client, ship_symbol, nav_result["data"]["nav"])
+                current_waypoint = nearest["symbol"]
 
                 print("Arrived at fuel station")
 
@@ -119,7 +105,6 @@ def test_refuel():
             if status != "DOCKED":
                 print("\nDocking at station...")
                 client.dock_ship(ship_symbol)
-                time.sleep(1)
         except Exception as e:
             print(f"Docking failed: {str(e)}")
             return
@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The modules under src import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from client import SpaceTradersClient, TokenBucket  # noqa: E402
+
+
+class FakeClock:
+    """Stand-in for time.monotonic and time.sleep that only moves when told"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """Freeze the monotonic clock used by the client's pacing and caches"""
+    clock = FakeClock()
+    monkeypatch.setattr("client.time.monotonic", clock.monotonic)
+    monkeypatch.setattr("client.time.sleep", clock.sleep)
+    return clock
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    """Point the response cache log at a temporary file"""
+    path = tmp_path / "responses.jsonl"
+    monkeypatch.setattr(SpaceTradersClient, "CACHE_PATH", path)
+    return path
+
+
+@pytest.fixture
+def client(cache_path):
+    """Client with a private cache log and no rate-limit pacing"""
+    client = SpaceTradersClient("test-token")
+    client.rate_limiter = TokenBucket(rate=1000, capacity=1000)
+    yield client
+    client.close()
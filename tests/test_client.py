@@ -0,0 +1,378 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from client import (ApiError, SpaceTradersClient, TokenBucket, TTLCache,
+                    parse_error_code)
+
+
+def make_response(body, status_code=200):
+    """Build a requests.Response carrying a JSON body"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body).encode()
+    return response
+
+
+def write_cache_log(path, endpoints, fetched_at=None):
+    """Write one cache log line per endpoint"""
+    fetched_at = time.time() if fetched_at is None else fetched_at
+    path.write_text(
+        "".join(
+            json.dumps(
+                {"endpoint": endpoint, "time": fetched_at, "response": {"data": 1}}
+            )
+            + "\n"
+            for endpoint in endpoints
+        )
+    )
+
+
+def test_token_bucket_allows_a_burst_then_paces(fake_clock):
+    bucket = TokenBucket(rate=2, capacity=2)
+
+    for _ in range(4):
+        bucket.acquire()
+
+    # The first two calls use the burst; each later one waits for a refill
+    assert fake_clock.sleeps == [0.5, 0.5]
+
+
+def test_token_bucket_refills_while_idle(fake_clock):
+    bucket = TokenBucket(rate=2, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+
+    fake_clock.now += 1
+    bucket.acquire()
+    bucket.acquire()
+
+    assert fake_clock.sleeps == []
+
+
+def test_ttl_cache_expires_entries(fake_clock):
+    cache = TTLCache(ttl=30)
+    cache.set("market", {"data": 1})
+
+    fake_clock.now += 29
+    assert cache.get("market") == {"data": 1}
+
+    fake_clock.now += 1
+    assert cache.get("market") is None
+    assert "market" not in cache.entries
+
+
+def test_ttl_cache_evicts_oldest_past_maxsize(fake_clock):
+    cache = TTLCache(ttl=30, maxsize=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+        fake_clock.now += 1
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "b"
+    assert cache.get("c") == "c"
+
+
+def test_concurrent_gets_share_one_request(client, monkeypatch):
+    calls = []
+    release = threading.Event()
+
+    def request(method, url, **kwargs):
+        calls.append(url)
+        # Hold the first request open so the other callers pile up behind it
+        release.wait(timeout=5)
+        return make_response({"data": {"symbol": "ZERO-1"}})
+
+    monkeypatch.setattr(client.session, "request", request)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(client.get_agent) for _ in range(5)]
+        time.sleep(0.2)
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert len(calls) == 1
+    assert all(result == {"data": {"symbol": "ZERO-1"}} for result in results)
+    assert client._inflight == {}
+
+
+def test_concurrent_gets_share_errors(client, monkeypatch):
+    release = threading.Event()
+
+    def request(method, url, **kwargs):
+        release.wait(timeout=5)
+        return make_response({"error": {"message": "down", "code": 500}}, 500)
+
+    monkeypatch.setattr(client.session, "request", request)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(client.get_agent) for _ in range(3)]
+        time.sleep(0.2)
+        release.set()
+        errors = [future.exception(timeout=5) for future in futures]
+
+    assert all(error is not None and error.status_code == 500 for error in errors)
+    assert client._inflight == {}
+
+
+def test_interrupted_get_is_not_shared_with_waiters(client):
+    started = threading.Event()
+    results = []
+
+    def interrupted_fetch():
+        started.set()
+        time.sleep(0.2)
+        raise KeyboardInterrupt
+
+    def wait_for_shared_fetch():
+        started.wait(timeout=5)
+        results.append(client._single_flight("my/agent", lambda: "fetched"))
+
+    waiter = threading.Thread(target=wait_for_shared_fetch)
+    waiter.start()
+    try:
+        client._single_flight("my/agent", interrupted_fetch)
+    except KeyboardInterrupt:
+        pass
+    waiter.join(timeout=5)
+
+    # The waiter fetched for itself instead of inheriting the interrupt
+    assert results == ["fetched"]
+    assert client._inflight == {}
+
+
+def test_disk_cache_skips_torn_last_line(cache_path):
+    write_cache_log(cache_path, ["systems/X1-A"])
+    with open(cache_path, "a") as f:
+        f.write('{"endpoint": "systems/X1-B", "ti')
+
+    client = SpaceTradersClient("test-token")
+    try:
+        assert list(client._disk_cache) == ["systems/X1-A"]
+        # The torn line is dropped from the log as well
+        assert len(cache_path.read_text().splitlines()) == 1
+        assert client._disk_cache_lines == 1
+    finally:
+        client.close()
+
+
+def test_disk_cache_drops_expired_entries_on_load(cache_path):
+    expired = time.time() - SpaceTradersClient.STATIC_CACHE_TTL - 1
+    write_cache_log(cache_path, ["systems/X1-OLD"], fetched_at=expired)
+    with open(cache_path, "a") as f:
+        f.write(
+            json.dumps(
+                {"endpoint": "systems/X1-A", "time": time.time(), "response": {}}
+            )
+            + "\n"
+        )
+
+    client = SpaceTradersClient("test-token")
+    try:
+        assert list(client._disk_cache) == ["systems/X1-A"]
+        assert len(cache_path.read_text().splitlines()) == 1
+    finally:
+        client.close()
+
+
+def test_disk_cache_compacts_after_slack(client, cache_path, monkeypatch):
+    monkeypatch.setattr(SpaceTradersClient, "CACHE_LOG_SLACK", 3)
+    monkeypatch.setattr(
+        client.session,
+        "request",
+        lambda method, url, **kwargs: make_response({"data": url}),
+    )
+
+    client._make_request("GET", "systems/X1-A")
+    client._make_request("GET", "systems/X1-GONE")
+    for _ in range(4):
+        # Age every entry so the next lookup is re-fetched and re-logged
+        for entry in client._disk_cache.values():
+            entry["time"] -= SpaceTradersClient.STATIC_CACHE_TTL
+        client._make_request("GET", "systems/X1-A")
+
+    # The sixth line left 4 superseded lines, past the slack of 3, so the log
+    # was rewritten and the expired entry dropped from disk and memory alike
+    lines = cache_path.read_text().splitlines()
+    assert [json.loads(line)["endpoint"] for line in lines] == ["systems/X1-A"]
+    assert list(client._disk_cache) == ["systems/X1-A"]
+    assert client._disk_cache_lines == 1
+
+
+def test_fuel_check_ignores_market_snapshot_taken_from_afar(client, monkeypatch):
+    responses = iter(
+        [
+            # Fetched while planning sales, with no ship at the market
+            make_response({"data": {"symbol": "X1-A-1", "imports": []}}),
+            # Fetched again once a ship has docked there
+            make_response(
+                {"data": {"symbol": "X1-A-1", "tradeGoods": [{"symbol": "FUEL"}]}}
+            ),
+        ]
+    )
+    calls = []
+
+    def request(method, url, **kwargs):
+        calls.append(url)
+        return next(responses)
+
+    monkeypatch.setattr(client.session, "request", request)
+
+    client.get_market("X1-A", "X1-A-1")
+    assert client.check_waypoint_sells_fuel("X1-A", "X1-A-1") is True
+    assert len(calls) == 2
+
+
+def no_jitter(monkeypatch):
+    """Make the rate-limit back-off deterministic"""
+    monkeypatch.setattr("client.random.uniform", lambda low, high: 0)
+
+
+def rate_limited(retry_after_header=None, retry_after_body=None):
+    """Build a 429 response carrying the back-off in a header or the body"""
+    error = {"message": "Too many requests", "code": 429}
+    if retry_after_body is not None:
+        error["data"] = {"retryAfter": retry_after_body}
+    response = make_response({"error": error}, 429)
+    if retry_after_header is not None:
+        response.headers["Retry-After"] = str(retry_after_header)
+    return response
+
+
+def serve(monkeypatch, client, *responses):
+    """Answer the client's requests with the given responses, in order"""
+    # Rebuild the bucket so it reads the same (possibly frozen) clock as the test
+    client.rate_limiter = TokenBucket(rate=1000, capacity=1000)
+    queue = iter(responses)
+    monkeypatch.setattr(
+        client.session, "request", lambda method, url, **kwargs: next(queue)
+    )
+
+
+def test_rate_limit_retry_prefers_retry_after_header(client, fake_clock, monkeypatch):
+    no_jitter(monkeypatch)
+    serve(
+        monkeypatch,
+        client,
+        rate_limited(retry_after_header=1.5, retry_after_body=7),
+        make_response({"data": "ok"}),
+    )
+
+    assert client.get_agent() == {"data": "ok"}
+    assert fake_clock.sleeps == [1.5]
+
+
+def test_rate_limit_retry_falls_back_to_body_retry_after(
+    client, fake_clock, monkeypatch
+):
+    no_jitter(monkeypatch)
+    serve(
+        monkeypatch,
+        client,
+        rate_limited(retry_after_body=2.5),
+        make_response({"data": "ok"}),
+    )
+
+    assert client.get_agent() == {"data": "ok"}
+    assert fake_clock.sleeps == [2.5]
+
+
+def test_rate_limit_retry_is_capped(client, fake_clock, monkeypatch):
+    no_jitter(monkeypatch)
+    serve(
+        monkeypatch,
+        client,
+        rate_limited(retry_after_header=600),
+        make_response({"data": "ok"}),
+    )
+
+    client.get_agent()
+    assert fake_clock.sleeps == [SpaceTradersClient.RETRY_DELAY_CAP]
+
+
+def test_final_rate_limit_raises_api_error(client, fake_clock, monkeypatch):
+    no_jitter(monkeypatch)
+    attempts = SpaceTradersClient.MAX_RATE_LIMIT_RETRIES + 1
+    serve(
+        monkeypatch,
+        client,
+        *[rate_limited(retry_after_header=1) for _ in range(attempts)],
+    )
+
+    with pytest.raises(ApiError) as excinfo:
+        client.get_agent()
+
+    assert excinfo.value.status_code == 429
+    assert excinfo.value.retry_after == 1
+    # No pointless wait after the last attempt
+    assert len(fake_clock.sleeps) == attempts - 1
+
+
+def test_parse_error_code_reads_the_body_code():
+    response = make_response({"error": {"message": "On cooldown", "code": 4000}}, 409)
+    assert parse_error_code(response) == 4000
+
+
+def test_parse_error_code_tolerates_missing_codes():
+    assert parse_error_code(None) is None
+    assert parse_error_code(make_response({"error": {"message": "x"}}, 400)) is None
+    assert parse_error_code(make_response(["not", "an", "object"], 400)) is None
+
+    response = requests.Response()
+    response.status_code = 502
+    response._content = b"<html>Bad gateway</html>"
+    assert parse_error_code(response) is None
+
+
+def test_api_error_carries_the_body_code(client, monkeypatch):
+    serve(
+        monkeypatch,
+        client,
+        make_response({"error": {"message": "Not in orbit", "code": 4236}}, 400),
+    )
+
+    with pytest.raises(ApiError) as excinfo:
+        client.extract_resources("ZERO-1")
+
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.error_code == 4236
+
+
+def market_response(price):
+    """Build a market response whose only varying field is a price"""
+    return make_response({"data": {"symbol": "X1-A-1", "price": price}})
+
+
+def test_market_snapshot_is_reused_while_fresh(client, fake_clock, monkeypatch):
+    serve(monkeypatch, client, market_response(1))
+
+    first = client.get_market("X1-A", "X1-A-1")
+    fake_clock.now += SpaceTradersClient.MARKET_CACHE_TTL - 1
+
+    # A second request would exhaust the served responses
+    assert client.get_market("X1-A", "X1-A-1") is first
+
+
+def test_stale_market_is_served_while_refreshing(client, fake_clock, monkeypatch):
+    serve(monkeypatch, client, market_response(1), market_response(2))
+
+    client.get_market("X1-A", "X1-A-1")
+    fake_clock.now += SpaceTradersClient.MARKET_CACHE_TTL
+
+    # The old snapshot comes back at once and a refresh runs in the background
+    assert client.get_market("X1-A", "X1-A-1")["data"]["price"] == 1
+    client._market_refresher.shutdown(wait=True)
+    assert client.get_market("X1-A", "X1-A-1")["data"]["price"] == 2
+
+
+def test_expired_market_is_fetched_again(client, fake_clock, monkeypatch):
+    serve(monkeypatch, client, market_response(1), market_response(2))
+
+    client.get_market("X1-A", "X1-A-1")
+    fake_clock.now += SpaceTradersClient.MARKET_STALE_TTL
+
+    assert client.get_market("X1-A", "X1-A-1")["data"]["price"] == 2
@@ -0,0 +1,65 @@
+from automation.coordinated_mining import find_best_markets_for_cargo
+from client import ApiError
+
+
+class FakeMarketsClient:
+    """Client stand-in that only answers get_system_markets"""
+
+    def __init__(self, markets=None, error=None):
+        self.markets = markets or {}
+        self.error = error
+        self.calls = []
+
+    def get_system_markets(self, system):
+        self.calls.append(system)
+        if self.error:
+            raise self.error
+        return self.markets
+
+
+def market(imports, prices=None):
+    """Build market data importing the given goods at optional sell prices"""
+    return {
+        "imports": [{"symbol": symbol} for symbol in imports],
+        "tradeGoods": [
+            {"symbol": symbol, "sellPrice": price}
+            for symbol, price in (prices or {}).items()
+        ],
+    }
+
+
+def test_picks_the_best_paying_importer_for_each_good():
+    client = FakeMarketsClient(
+        {
+            "X1-A-1": market(["IRON_ORE", "COPPER_ORE"], {"IRON_ORE": 10}),
+            "X1-A-2": market(["IRON_ORE"], {"IRON_ORE": 25}),
+            "X1-A-3": market(["COPPER_ORE"], {"COPPER_ORE": 40}),
+        }
+    )
+
+    best = find_best_markets_for_cargo(client, "X1-A", ["IRON_ORE", "COPPER_ORE"])
+
+    assert best == {"IRON_ORE": "X1-A-2", "COPPER_ORE": "X1-A-3"}
+    # Every market comes from one system-wide lookup
+    assert client.calls == ["X1-A"]
+
+
+def test_ignores_markets_that_do_not_import_the_good():
+    client = FakeMarketsClient(
+        {
+            # Lists a price but does not import the good, so may not buy it
+            "X1-A-1": market([], {"IRON_ORE": 99}),
+            # Imports it without a listed price, which still beats nothing
+            "X1-A-2": market(["IRON_ORE"]),
+        }
+    )
+
+    best = find_best_markets_for_cargo(client, "X1-A", ["IRON_ORE", "QUARTZ_SAND"])
+
+    assert best == {"IRON_ORE": "X1-A-2"}
+
+
+def test_returns_no_markets_when_the_lookup_fails():
+    client = FakeMarketsClient(error=ApiError("down", status_code=503))
+
+    assert find_best_markets_for_cargo(client, "X1-A", ["IRON_ORE"]) == {}